@@ -15,16 +15,78 @@ APP_DESCRIPTION = (
 # Model Configuration
 MODEL_PROVIDER = "local"  # Set to 'local' or 'openai'
 OLLAMA_HOST = os.getenv("OLLAMA_HOST", "localhost") # Default to localhost if not set
-OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3") # Default model for Ollama
+# Default model for Ollama. Ollama's default tags are already 4-bit quantized;
+# set an explicit tag (e.g. "llama3:8b-instruct-q4_K_M") to choose another quantization.
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3")
+# How long Ollama keeps the model (and its prompt cache) loaded after a request
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "10m")
 
 # Local model settings (if MODEL_PROVIDER is 'local')
 LOCAL_TRANSCRIPTION_MODEL = "openai/whisper-base.en" 
 LOCAL_ANALYSIS_MODEL = "microsoft/Phi-3-mini-4k-instruct"
+# Backend for local transcription: 'faster-whisper' runs the model int8-quantized
+# with CTranslate2 when the package is installed; 'transformers' uses the
+# Hugging Face pipeline, which is also the fallback if faster-whisper is missing.
+LOCAL_TRANSCRIPTION_BACKEND = os.getenv("LOCAL_TRANSCRIPTION_BACKEND", "faster-whisper")
+FASTER_WHISPER_MODEL = "base.en"
+# Long recordings are split into windows of this many seconds, and up to
+# LOCAL_TRANSCRIPTION_CHUNK_BATCH windows are run through the model at once
+LOCAL_TRANSCRIPTION_CHUNK_LENGTH_S = 30
+LOCAL_TRANSCRIPTION_CHUNK_BATCH = 8
+
+# Transcription batching settings
+# Uploads that arrive within TRANSCRIPTION_BATCH_WAIT_MS of each other are
+# transcribed together, up to TRANSCRIPTION_BATCH_SIZE files per model call.
+TRANSCRIPTION_BATCH_SIZE = int(os.getenv("TRANSCRIPTION_BATCH_SIZE", "4"))
+TRANSCRIPTION_BATCH_WAIT_MS = 50
+
+# Generation limits
+# Upper bound on generated tokens for summaries and sentiment analysis
+ANALYSIS_MAX_TOKENS = 512
+# Upper bound on generated tokens for Q&A answers
+QA_MAX_TOKENS = 1024
+# Sampling temperature; 0 gives deterministic, repeatable answers
+ANALYSIS_TEMPERATURE = 0
+
+# Response cache settings
+# Identical requests to the same model are answered from memory for this many seconds
+RESPONSE_CACHE_TTL_SECONDS = 1800
+# Maximum number of cached responses; the least recently used are evicted first
+RESPONSE_CACHE_MAX_ENTRIES = 512
+
+# Q&A prompt settings
+# Number of most recent Q&A turns included in each prompt
+CHAT_HISTORY_WINDOW = 4
+# Transcripts longer than this many words are reduced to the excerpts most relevant to the question
+QA_FULL_TRANSCRIPT_WORDS = 3000
+# Size of each transcript excerpt in words (roughly 500 tokens)
+QA_CHUNK_WORDS = 400
+# Number of excerpts included in the prompt for long transcripts
+QA_MAX_CHUNKS = 4
 
 # OpenAI API settings (if MODEL_PROVIDER is 'openai')
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_TRANSCRIPTION_MODEL = "whisper-1"
 OPENAI_ANALYSIS_MODEL = "gpt-3.5-turbo"
+# Recordings longer than OPENAI_SPLIT_MINS are cut into OPENAI_SEGMENT_MINS pieces
+# that are transcribed in parallel, at most OPENAI_PARALLEL_UPLOADS at a time
+OPENAI_SPLIT_MINS = 10
+OPENAI_SEGMENT_MINS = 5
+OPENAI_PARALLEL_UPLOADS = 4
+# Idle pooled connections to OpenAI are kept open this many seconds, so uploads
+# that follow each other closely skip the TCP and TLS handshakes
+OPENAI_KEEPALIVE_SECONDS = 30
+
+# Transcript Cache Configuration
+# Transcripts are cached on disk by audio content so re-uploads skip transcription.
+TRANSCRIPT_CACHE_DIR = os.getenv(
+    "VOICE_ANALYSIS_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "voice_analysis", "transcripts")
+)
+# Set VOICE_ANALYSIS_NO_CACHE=1 to always transcribe from scratch.
+TRANSCRIPT_CACHE_ENABLED = os.getenv("VOICE_ANALYSIS_NO_CACHE") != "1"
+# Only the most recently used entries are kept
+TRANSCRIPT_CACHE_MAX_ENTRIES = 500
 
 # File Validation Configuration
 # Maximum file size in megabytes (MB)
@@ -34,6 +96,17 @@ MAX_FILE_LENGTH_MINS = 15
 # List of allowed audio file extensions (add more as needed)
 ALLOWED_FILE_EXTENSIONS = [".mp3", ".wav", ".m4a", ".flac", ".ogg"]
 
+# Server Configuration
+# Number of events of the same kind that may run at once across all users.
+GRADIO_CONCURRENCY = int(os.getenv("GRADIO_CONCURRENCY", "4"))
+# Maximum number of events waiting in the queue before new requests are rejected.
+GRADIO_MAX_QUEUE_SIZE = int(os.getenv("GRADIO_MAX_QUEUE_SIZE", "64"))
+# Size of the worker thread pool used to run synchronous event handlers.
+GRADIO_MAX_THREADS = int(os.getenv("GRADIO_MAX_THREADS", "40"))
+# How often (seconds) Gradio sweeps uploaded files, and how old (seconds) they must be to be removed.
+GRADIO_DELETE_CACHE = (3600, 3600)
+
 # Logging Configuration
-LOG_FILE_PATH = "logs/app.log"
+# Set VOICE_ANALYSIS_LOG_FILE to write the log somewhere else (the test suite does)
+LOG_FILE_PATH = os.getenv("VOICE_ANALYSIS_LOG_FILE", "logs/app.log")
 LOG_LEVEL = "INFO" # Can be "DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"
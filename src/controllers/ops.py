@@ -0,0 +1,225 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+from src import config
+from src.services.analysis_service import analysis_service, collect_stream
+from src.services.transcription_service import transcription_service
+from src.services.batched_transcriber import batched_transcriber
+from src.services.transcript_cache import TranscriptCache
+from src.utils.validator import Validator
+from src.utils.hashing import content_digest
+from src.utils.exceptions import AppError, FileSizeExceeded
+from src.logging_config import logger
+
+
+@dataclass
+class SessionState:
+    """
+    The per-user state of one browser session.
+    Services are process-wide singletons, so this is all a new session creates.
+    """
+    transcript: str | None = None
+    chat_history: list = field(default_factory=list)
+    # Summary and sentiment depend only on the transcript, so they are kept until a new file is processed.
+    summary: str | None = None
+    sentiment: str | None = None
+
+
+# Process-wide transcript cache shared by all sessions.
+transcript_cache = TranscriptCache()
+
+
+def _read_audio_file(file_path: str) -> bytes:
+    """
+    Reads an audio file that has passed Validator.check_file into memory.
+    The read is capped at MAX_FILE_SIZE_MB, in case the file grew after it was checked.
+    """
+    limit = int(config.MAX_FILE_SIZE_MB * 1024 * 1024)
+    with open(file_path, "rb") as f:
+        audio = f.read(limit + 1)
+    if len(audio) > limit:
+        raise FileSizeExceeded(f"File size exceeds the {config.MAX_FILE_SIZE_MB}MB limit.")
+    return audio
+
+
+def _transcription_model() -> str:
+    """
+    Returns the provider and identifier of the transcription model currently in use.
+    """
+    provider = config.MODEL_PROVIDER.lower()
+    if provider == 'openai':
+        return f"{provider}:{config.OPENAI_TRANSCRIPTION_MODEL}"
+    if transcription_service._uses_faster_whisper():
+        return f"{provider}:faster-whisper/{config.FASTER_WHISPER_MODEL}"
+    return f"{provider}:{config.LOCAL_TRANSCRIPTION_MODEL}"
+
+
+def _prepare_audio(file_path: str) -> tuple:
+    """
+    Reads the audio file once, looks its transcript up in the cache and, on a
+    miss, preloads the audio for the transcription model.
+    Returns the cache key, the cached transcript (or None) and the prepared audio.
+    """
+    audio = _read_audio_file(file_path)
+    cache_key = f"{_transcription_model()}:{content_digest(audio)}"
+    transcript = transcript_cache.get(cache_key)
+    if transcript is None:
+        audio = transcription_service.preload_audio(audio)
+    return cache_key, transcript, audio
+
+
+def _ensure_transcript_exists(state: SessionState):
+    """
+    A private helper to check if a transcript is ready for analysis.
+    """
+    if not state.transcript:
+        logger.warning("Attempted to perform analysis before processing a file.")
+        raise AppError("Please process an audio file before requesting analysis.")
+
+
+async def process_audio_file(state: SessionState, file_path: str):
+    """
+    The main workflow. It validates and transcribes the audio file,
+    preparing the session for on-demand analysis.
+    The blocking validation and transcription steps run in worker threads
+    so the event loop stays free for other sessions.
+
+    Args:
+        state: The session to load the transcript into.
+        file_path: The path to the temporary audio file uploaded by the user.
+
+    Raises:
+        AppError: If any step in the validation or transcription fails.
+    """
+    try:
+        # Reset state for a new file
+        state.transcript = None
+        state.chat_history = []
+        state.summary = None
+        state.sentiment = None
+        logger.info(f"Starting processing for audio file: {file_path}")
+
+        # Open a connection to a remote provider while the upload is checked; a no-op for the local model
+        connection_warm_up = asyncio.create_task(asyncio.to_thread(transcription_service.warm_up_connection))
+
+        # 1. Reject bad uploads with the checks that only stat the file and read its header
+        await asyncio.to_thread(Validator.check_file, file_path)
+
+        # 2. Check the duration while the file is read, looked up in the transcript
+        #    cache and decoded for the model, so the two stages overlap
+        validation, preparation = await asyncio.gather(
+            asyncio.to_thread(Validator.check_duration, file_path),
+            asyncio.to_thread(_prepare_audio, file_path),
+            return_exceptions=True
+        )
+        # A validation failure explains any failure to prepare the same file, so it is reported first
+        if isinstance(validation, Exception):
+            raise validation
+        if isinstance(preparation, Exception):
+            raise preparation
+        duration_seconds = validation
+        cache_key, transcript, audio = preparation
+
+        # 3. Transcribe the audio on a cache miss. Uploads are batched with other
+        #    sessions' only when the model can run them in one forward pass;
+        #    otherwise each runs in its own worker thread so sessions stay concurrent.
+        if transcript is None:
+            # Let the warm-up finish first, so the upload reuses its connection instead of opening another
+            await connection_warm_up
+            if transcription_service.supports_batching():
+                transcript = await batched_transcriber.submit(file_path, audio, duration_seconds)
+            else:
+                transcript = await asyncio.to_thread(
+                    transcription_service.transcribe, file_path, audio, duration_seconds
+                )
+            # Writing and trimming the cache touches the disk, so keep it off the event loop
+            await asyncio.to_thread(transcript_cache.put, cache_key, transcript)
+        state.transcript = transcript
+
+        logger.info(f"Successfully processed and transcribed file: {file_path}")
+
+    except AppError as e:
+        # Catch our known application errors, log them, and re-raise
+        logger.error(f"An application error occurred during processing: {e}", exc_info=True)
+        raise e
+    except Exception as e:
+        # Catch any other unexpected errors
+        logger.critical(f"An unexpected critical error occurred: {e}", exc_info=True)
+        raise AppError("An unexpected error occurred. Please check the logs.")
+
+
+def get_transcript(state: SessionState) -> str:
+    """
+    Returns the stored transcript.
+    """
+    _ensure_transcript_exists(state)
+    logger.info("Transcript requested by user.")
+    return state.transcript
+
+
+async def get_summary(state: SessionState) -> str:
+    """
+    Generates a summary for the currently loaded transcript.
+    """
+    return await collect_stream(stream_summary(state))
+
+
+async def stream_summary(state: SessionState) -> AsyncIterator[str]:
+    """
+    Streams a summary for the currently loaded transcript as it is generated.
+    """
+    _ensure_transcript_exists(state)
+    logger.info("Summary requested by user.")
+    if state.summary is None:
+        summary = ""
+        async for summary in analysis_service.summarize_stream(state.transcript):
+            yield summary
+        state.summary = summary
+    else:
+        yield state.summary
+
+
+async def get_sentiment(state: SessionState) -> str:
+    """
+    Performs sentiment analysis on the currently loaded transcript.
+    """
+    return await collect_stream(stream_sentiment(state))
+
+
+async def stream_sentiment(state: SessionState) -> AsyncIterator[str]:
+    """
+    Streams a sentiment analysis for the currently loaded transcript as it is generated.
+    """
+    _ensure_transcript_exists(state)
+    logger.info("Sentiment analysis requested by user.")
+    if state.sentiment is None:
+        sentiment = ""
+        async for sentiment in analysis_service.get_sentiment_stream(state.transcript):
+            yield sentiment
+        state.sentiment = sentiment
+    else:
+        yield state.sentiment
+
+
+async def answer_question(state: SessionState, question: str) -> str:
+    """
+    Answers a question about the currently loaded transcript.
+    """
+    return await collect_stream(answer_question_stream(state, question))
+
+
+async def answer_question_stream(state: SessionState, question: str) -> AsyncIterator[str]:
+    """
+    Streams the answer to a question about the currently loaded transcript.
+    The turn is added to the chat history once the answer is complete.
+    """
+    _ensure_transcript_exists(state)
+    if not question or not question.strip():
+        raise AppError("Question cannot be empty.")
+
+    logger.info(f"Question received from user: '{question}'")
+    response = ""
+    async for response in analysis_service.answer_question_stream(state.transcript, question, state.chat_history):
+        yield response
+    # Update history with the new turn
+    state.chat_history.append([question, response])
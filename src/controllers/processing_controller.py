@@ -1,104 +1,80 @@
-from src.services.transcription_service import TranscriptionService
-from src.services.analysis_service import AnalysisService
-from src.utils.validator import Validator
-from src.utils.exceptions import AppError
-from src.logging_config import logger
+from typing import AsyncIterator
+from src.controllers import ops
+from src.controllers.ops import SessionState
+from src.services.transcription_service import transcription_service
+from src.services.analysis_service import analysis_service
 
 
 class ProcessingController:
     """
     The central controller that orchestrates the entire analysis process.
-    It manages the application's state and coordinates the services.
+    It bundles one session's state with the operations in ops.py, which
+    coordinate the process-wide services.
     """
-    def __init__(self):
+    def __init__(self, state: SessionState = None):
         """
-        Initializes the controller and its required services.
+        Initializes the controller with a fresh or existing session state.
         """
-        self.transcription_service = TranscriptionService()
-        self.analysis_service = AnalysisService()
-        self.validator = Validator()
-        self.transcript: str | None = None
-        self.chat_history: list = []
-        logger.info("ProcessingController initialized.")
+        self.state = state or SessionState()
+        self.transcription_service = transcription_service
+        self.analysis_service = analysis_service
 
-    def process_audio_file(self, file_path: str):
-        """
-        The main workflow method. It validates and transcribes the audio file.
-        This method prepares the controller for on-demand analysis.
-
-        Args:
-            file_path: The path to the temporary audio file uploaded by the user.
-
-        Raises:
-            AppError: If any step in the validation or transcription fails.
-        """
-        try:
-            # Reset state for a new file
-            self.transcript = None
-            self.chat_history = []
-            logger.info(f"Starting processing for audio file: {file_path}")
-
-            # 1. Validate the file
-            self.validator.validate_audio_file(file_path)
+    @property
+    def transcript(self) -> str | None:
+        return self.state.transcript
 
-            # 2. Transcribe the file
-            self.transcript = self.transcription_service.transcribe(file_path)
+    @transcript.setter
+    def transcript(self, value: str | None):
+        self.state.transcript = value
 
-            logger.info(f"Successfully processed and transcribed file: {file_path}")
+    @property
+    def chat_history(self) -> list:
+        return self.state.chat_history
 
-        except AppError as e:
-            # Catch our known application errors, log them, and re-raise
-            logger.error(f"An application error occurred during processing: {e}", exc_info=True)
-            raise e
-        except Exception as e:
-            # Catch any other unexpected errors
-            logger.critical(f"An unexpected critical error occurred: {e}", exc_info=True)
-            raise AppError("An unexpected error occurred. Please check the logs.")
-
-    def _ensure_transcript_exists(self):
+    async def process_audio_file(self, file_path: str):
         """
-        A private helper to check if a transcript is ready for analysis.
+        Validates and transcribes the audio file. See ops.process_audio_file.
         """
-        if not self.transcript:
-            logger.warning("Attempted to perform analysis before processing a file.")
-            raise AppError("Please process an audio file before requesting analysis.")
+        await ops.process_audio_file(self.state, file_path)
 
     def get_transcript(self) -> str:
         """
         Returns the stored transcript.
         """
-        self._ensure_transcript_exists()
-        logger.info("Transcript requested by user.")
-        return self.transcript
+        return ops.get_transcript(self.state)
 
-    def get_summary(self) -> str:
+    async def get_summary(self) -> str:
         """
         Generates a summary for the currently loaded transcript.
         """
-        self._ensure_transcript_exists()
-        logger.info("Summary requested by user.")
-        return self.analysis_service.summarize(self.transcript)
+        return await ops.get_summary(self.state)
+
+    def stream_summary(self) -> AsyncIterator[str]:
+        """
+        Streams a summary for the currently loaded transcript as it is generated.
+        """
+        return ops.stream_summary(self.state)
 
-    def get_sentiment(self) -> str:
+    async def get_sentiment(self) -> str:
         """
         Performs sentiment analysis on the currently loaded transcript.
         """
-        self._ensure_transcript_exists()
-        logger.info("Sentiment analysis requested by user.")
-        return self.analysis_service.get_sentiment(self.transcript)
+        return await ops.get_sentiment(self.state)
+
+    def stream_sentiment(self) -> AsyncIterator[str]:
+        """
+        Streams a sentiment analysis for the currently loaded transcript as it is generated.
+        """
+        return ops.stream_sentiment(self.state)
 
-    def answer_question(self, question: str) -> str:
+    async def answer_question(self, question: str) -> str:
         """
         Answers a question about the currently loaded transcript.
         """
-        self._ensure_transcript_exists()
-        if not question or not question.strip():
-            raise AppError("Question cannot be empty.")
-            
-        logger.info(f"Question received from user: '{question}'")
-        # The entire history to the analysis service
-        response = self.analysis_service.answer_question(self.transcript, question, self.chat_history)
-        # Update history with the new turn
-        self.chat_history.append([question, response])
-        return response
-    
\ No newline at end of file
+        return await ops.answer_question(self.state, question)
+
+    def answer_question_stream(self, question: str) -> AsyncIterator[str]:
+        """
+        Streams the answer to a question about the currently loaded transcript.
+        """
+        return ops.answer_question_stream(self.state, question)
@@ -1,22 +1,36 @@
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from src import config
 
+# Name of the application's logger. Third-party libraries log to their own
+# loggers and never reach the handlers configured here.
+LOGGER_NAME = "voice_analysis"
+
+_INITIALIZED = False
+
 def setup_logging():
     """
     Configures the application's logger.
+
+    Records are put on a queue and written to the console and log file by a
+    background listener thread, so logging calls on the request path never
+    wait on file I/O. Only the first call does any work; later calls return
+    the already configured logger.
     """
+    global _INITIALIZED
+    logger = logging.getLogger(LOGGER_NAME)
+    if _INITIALIZED:
+        return logger
+
     # Create logs directory if it doesn't exist
     os.makedirs(os.path.dirname(config.LOG_FILE_PATH), exist_ok=True)
 
-    # Configure the root logger
-    logger = logging.getLogger()
+    # Configure the application logger and keep its records away from the root logger's handlers
     logger.setLevel(config.LOG_LEVEL)
-
-    # Prevent logging from propagating to the root logger if handlers are already configured
-    if logger.hasHandlers():
-        logger.handlers.clear()
+    logger.propagate = False
 
     # Formatter
     formatter = logging.Formatter(
@@ -26,7 +40,6 @@ def setup_logging():
     # Console Handler (for printing logs to the terminal)
     ch = logging.StreamHandler()
     ch.setFormatter(formatter)
-    logger.addHandler(ch)
 
     # File Handler (for writing logs to a file)
     # RotatingFileHandler ensures log files don't grow indefinitely
@@ -36,8 +49,16 @@ def setup_logging():
         backupCount=5
     )
     fh.setFormatter(formatter)
-    logger.addHandler(fh)
 
+    # Queue Handler (hands records to the listener thread that owns the real handlers)
+    log_queue = queue.Queue(-1)
+    logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, ch, fh, respect_handler_level=True)
+    listener.start()
+    # Flush any queued records when the interpreter exits
+    atexit.register(listener.stop)
+
+    _INITIALIZED = True
     return logger
 
 # Initialize the logger for the application
@@ -1,49 +1,261 @@
+import asyncio
+import json
+import math
+import re
+import time
+from collections import Counter, OrderedDict
+from typing import AsyncIterator
+import httpx
 import ollama
-from openai import OpenAI, OpenAIError
+from openai import (
+    AsyncOpenAI,
+    OpenAIError,
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+    RateLimitError
+)
 from src import config
 from src.utils.exceptions import AnalysisError, IrrelevantQuestionError
+from src.utils.hashing import key_digest
 from src.logging_config import logger
 
 
+# Prompt templates. Each is split once, at import, around its {text} placeholder
+# by _split_template, so a prompt is built with a single join of three strings.
+_SUMMARY_TMPL = """Provide a concise summary of the following text.
+Focus on the key points and main conclusions.
+
+Text:
+---
+{text}
+---
+Summary:
+"""
+
+_SENTIMENT_TMPL = """Analyze the sentiment of the following text.
+Your response must have two parts:
+1.  **Sentiment:** Classify the sentiment as Positive, Negative, or Neutral.
+2.  **Justification:** Briefly explain why you chose that sentiment, referencing key words or phrases from the text.
+
+Format your response clearly using Markdown.
+
+Text:
+---
+{text}
+---
+Sentiment:
+"""
+
+# The Q&A system message holds the transcript and stays identical across turns,
+# so the local server can reuse its KV-cache for this prefix on follow-up questions.
+_QA_SYSTEM_TMPL = """You are a machine. You are a Q&A engine that answers questions about a document.
+You MUST follow these rules strictly:
+1. Use the earlier messages of this conversation to understand the user's question, especially for follow-ups.
+2. Find the answer to the user's latest question using ONLY the "Document Transcript".
+3. If the answer is not in the transcript, you MUST ONLY respond with the exact phrase: 'That information is not available in the provided document.'
+4. Do not apologize. Do not explain your reasoning. Do not add any other words.
+
+---
+**DOCUMENT TRANSCRIPT:**
+{text}
+---
+"""
+
+
+# The exact reply the Q&A prompt asks for when the transcript has no answer
+_UNANSWERABLE = re.compile(r"That information is not available in the provided document\.?", re.IGNORECASE)
+
+
+def _split_template(template: str) -> tuple:
+    """
+    Splits a prompt template into the static text before and after {text}.
+    """
+    head, _, tail = template.partition("{text}")
+    return head, tail
+
+
+_SUMMARY_PARTS = _split_template(_SUMMARY_TMPL)
+_SENTIMENT_PARTS = _split_template(_SENTIMENT_TMPL)
+_QA_SYSTEM_PARTS = _split_template(_QA_SYSTEM_TMPL)
+
+
+def _fill_template(parts: tuple, text: str) -> str:
+    """
+    Inserts the text between the static parts of a split prompt template.
+    """
+    head, tail = parts
+    return "".join((head, text, tail))
+
+
+def _tokenize(text: str) -> list:
+    """
+    Splits text into lowercase word tokens.
+    """
+    return re.findall(r"\w+", text.lower())
+
+
+def _select_relevant_chunks(text: str, question: str) -> str:
+    """
+    Reduces a long transcript to the excerpts most relevant to the question.
+
+    The transcript is split into fixed-size word chunks, which are ranked by
+    TF-IDF similarity to the question. The best chunks are returned in their
+    original order. Transcripts below the configured length are returned whole.
+    """
+    words = text.split()
+    if len(words) <= config.QA_FULL_TRANSCRIPT_WORDS:
+        return text
+
+    chunks = [
+        " ".join(words[i:i + config.QA_CHUNK_WORDS])
+        for i in range(0, len(words), config.QA_CHUNK_WORDS)
+    ]
+    chunk_counts = [Counter(_tokenize(chunk)) for chunk in chunks]
+    question_terms = set(_tokenize(question))
+
+    # Inverse document frequency of each question term across the chunks
+    idf = {
+        term: math.log((1 + len(chunks)) / (1 + sum(term in counts for counts in chunk_counts))) + 1
+        for term in question_terms
+    }
+    scores = [
+        sum(counts[term] * idf[term] for term in question_terms)
+        for counts in chunk_counts
+    ]
+
+    best = sorted(range(len(chunks)), key=lambda i: scores[i], reverse=True)[:config.QA_MAX_CHUNKS]
+    logger.info(f"Selected {len(best)} of {len(chunks)} transcript excerpts for the question.")
+    return "\n[...]\n".join(chunks[i] for i in sorted(best))
+
+
+async def collect_stream(stream: AsyncIterator[str]) -> str:
+    """
+    Consumes a stream of growing partial responses and returns the final one.
+    """
+    response = ""
+    async for partial in stream:
+        response = partial
+    return response
+
+
 class AnalysisService:
     """
     A service class for performing text analysis tasks.
     It uses Ollama for local analysis and the OpenAI API for remote analysis.
+    All provider calls are asynchronous so that waiting on the LLM does not
+    occupy a worker thread.
     """
+    _ollama_client: ollama.AsyncClient = None
+    _openai_client: AsyncOpenAI = None
+    _openai_client_key: str = None
+    # Completed responses keyed by request hash, holding (time stored, response)
+    _response_cache: OrderedDict = OrderedDict()
+    cache_hits = 0
+    cache_misses = 0
+
+    @classmethod
+    def _get_ollama_client(cls) -> ollama.AsyncClient:
+        """
+        Returns the shared Ollama client, creating it on first use.
+        Keeping one client per process lets every request reuse its
+        keep-alive connection pool instead of opening new connections.
+        """
+        if cls._ollama_client is None:
+            cls._ollama_client = ollama.AsyncClient(
+                host=f"http://{config.OLLAMA_HOST}:11434",
+                # httpx drops idle connections after 5 seconds by default, shorter than the
+                # gap between a user's clicks; keep them open so follow-up requests skip the
+                # TCP handshake.
+                limits=httpx.Limits(max_connections=16, max_keepalive_connections=4, keepalive_expiry=300),
+                # Fail fast if the server is unreachable, and give up on a stalled generation
+                timeout=httpx.Timeout(120, connect=5)
+            )
+        return cls._ollama_client
+
+    @classmethod
+    def _get_openai_client(cls) -> AsyncOpenAI:
+        """
+        Returns the shared OpenAI client, creating it on first use.
+        The client is rebuilt if the configured API key changes.
+        """
+        if cls._openai_client is None or cls._openai_client_key != config.OPENAI_API_KEY:
+            cls._openai_client = AsyncOpenAI(api_key=config.OPENAI_API_KEY, timeout=30, max_retries=3)
+            cls._openai_client_key = config.OPENAI_API_KEY
+        return cls._openai_client
+
+    def warm_up(self):
+        """
+        Asks the local Ollama server to load the analysis model into memory,
+        so the first user request does not wait for it.
+        A short-lived synchronous client is used because start-up runs outside
+        the event loop that the shared async client is bound to.
+        """
+        if config.MODEL_PROVIDER.lower() != 'local':
+            return
+        try:
+            logger.info(f"Warming up Ollama model: {config.OLLAMA_MODEL}")
+            # An empty prompt loads the model without generating any tokens.
+            ollama.Client(host=f"http://{config.OLLAMA_HOST}:11434").generate(
+                model=config.OLLAMA_MODEL,
+                prompt="",
+                keep_alive=config.OLLAMA_KEEP_ALIVE
+            )
+            logger.info("Ollama model warmed up.")
+        except Exception as e:
+            logger.warning(f"Ollama warm-up failed: {e}")
 
-    def _analyze_local(self, prompt: str) -> str:
+    async def _stream_local(self, messages: list, max_tokens: int) -> AsyncIterator[str]:
         """
-        Generates a response by calling the local Ollama server using the host
+        Streams a chat response from the local Ollama server using the host
         address defined in the application's configuration.
+        Yields the response text accumulated so far as each token arrives.
         """
 
         # Read the configured host from config.py
         ollama_host = config.OLLAMA_HOST
         
         try:
-            # Initialize the Ollama client with the determined host
-            client = ollama.Client(host=f"http://{ollama_host}:11434")
             logger.info(f"Sending analysis request to Ollama server at {ollama_host}.")
             
-            response = client.generate(
+            # keep_alive holds the model, and the KV-cache of the shared prompt prefix, in memory between turns
+            stream = await self._get_ollama_client().chat(
                 model=config.OLLAMA_MODEL,
-                prompt=prompt
+                messages=messages,
+                stream=True,
+                keep_alive=config.OLLAMA_KEEP_ALIVE,
+                options={"num_predict": max_tokens, "temperature": config.ANALYSIS_TEMPERATURE}
             )
             
-            logger.info("Ollama analysis successful.")
-            return response['response'].strip()
+            started = time.monotonic()
+            partial = ""
+            async for chunk in stream:
+                content = chunk['message']['content']
+                # The closing chunk carries only statistics; skip it rather than repeat the last update.
+                if not content:
+                    continue
+                if not partial:
+                    logger.info(f"Ollama first token after {time.monotonic() - started:.2f}s.")
+                partial += content
+                yield partial.strip()
+
+            logger.info(f"Ollama analysis successful in {time.monotonic() - started:.2f}s.")
 
         except ollama.ResponseError as e:
             logger.error(f"Ollama API error: {e.error}", exc_info=True)
             raise AnalysisError(f"An error occurred with the Ollama API: {e.error}")
+        except httpx.TimeoutException as e:
+            logger.error(f"Ollama request timed out: {e}", exc_info=True)
+            raise AnalysisError("The Ollama server took too long to respond. Please try again.")
         except Exception as e:
             # Catch other potential issues like connection problems
             logger.error(f"Error during Ollama request: {e}", exc_info=True)
             raise AnalysisError("An unexpected error occurred while communicating with the Ollama server.")
 
-    def _analyze_openai(self, prompt: str) -> str:
+    async def _stream_openai(self, messages: list, max_tokens: int) -> AsyncIterator[str]:
         """
-        Generates a response using the OpenAI API.
+        Streams a chat response from the OpenAI API.
+        Yields the response text accumulated so far as each token arrives.
         """
         if not config.OPENAI_API_KEY:
             logger.error("OpenAI API key not found for analysis.")
@@ -51,108 +263,196 @@ class AnalysisService:
         
         try:
             logger.info("Sending analysis request to OpenAI.")
-            client = OpenAI(api_key=config.OPENAI_API_KEY)
             
-            response = client.chat.completions.create(
+            stream = await self._get_openai_client().chat.completions.create(
                 model=config.OPENAI_ANALYSIS_MODEL,
-                messages=[{"role": "user", "content": prompt}]
+                messages=messages,
+                stream=True,
+                max_tokens=max_tokens,
+                temperature=config.ANALYSIS_TEMPERATURE
             )
             
-            content = response.choices[0].message.content
+            partial = ""
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    partial += chunk.choices[0].delta.content
+                    yield partial.strip()
+
             logger.info("OpenAI analysis successful.")
-            return content.strip()
-        except OpenAIError as e:
+        except APITimeoutError as e:
+            logger.error(f"OpenAI request timed out during analysis: {e}", exc_info=True)
+            raise AnalysisError("The OpenAI API took too long to respond. Please try again.")
+        except APIConnectionError as e:
+            logger.error(f"Could not connect to OpenAI during analysis: {e}", exc_info=True)
+            raise AnalysisError("Could not reach the OpenAI API. Please check the network connection.")
+        except RateLimitError as e:
+            retry_after = e.response.headers.get("retry-after")
+            logger.error(f"OpenAI rate limit reached during analysis (retry after: {retry_after}): {e}", exc_info=True)
+            wait = f"{retry_after} seconds" if retry_after else "a moment"
+            raise AnalysisError(f"The OpenAI API rate limit was reached. Please wait {wait} and try again.")
+        except APIStatusError as e:
             logger.error(f"OpenAI API error during analysis: {e.response.text}", exc_info=True)
-            raise AnalysisError(f"An OpenAI API error occurred: {e.response.status_code}")
+            raise AnalysisError(f"An OpenAI API error occurred: {e.status_code}")
+        except OpenAIError as e:
+            logger.error(f"OpenAI client error during analysis: {e}", exc_info=True)
+            raise AnalysisError("An OpenAI API error occurred.")
         except Exception as e:
             logger.error(f"An unexpected error occurred during OpenAI analysis: {e}", exc_info=True)
             raise AnalysisError("An unexpected error occurred while using the OpenAI API.")
 
-    def _analyze(self, prompt: str) -> str:
+    @staticmethod
+    def _cache_key(provider: str, messages: list, max_tokens: int) -> str:
+        """
+        Builds the response cache key from everything that determines the response.
+        """
+        model = config.OPENAI_ANALYSIS_MODEL if provider == 'openai' else config.OLLAMA_MODEL
+        request = json.dumps([messages, max_tokens, config.ANALYSIS_TEMPERATURE])
+        return key_digest(f"{provider}|{model}|{request}")
+
+    @classmethod
+    def _get_cached_response(cls, key: str) -> str | None:
+        """
+        Returns a cached response that has not expired, or None.
+        """
+        entry = cls._response_cache.get(key)
+        if entry is None:
+            cls.cache_misses += 1
+            return None
+        stored_at, response = entry
+        if time.monotonic() - stored_at > config.RESPONSE_CACHE_TTL_SECONDS:
+            del cls._response_cache[key]
+            cls.cache_misses += 1
+            return None
+        cls._response_cache.move_to_end(key)
+        cls.cache_hits += 1
+        return response
+
+    @classmethod
+    def _store_response(cls, key: str, response: str):
+        """
+        Caches a completed response, evicting the least recently used entries when full.
+        """
+        cls._response_cache[key] = (time.monotonic(), response)
+        cls._response_cache.move_to_end(key)
+        while len(cls._response_cache) > config.RESPONSE_CACHE_MAX_ENTRIES:
+            cls._response_cache.popitem(last=False)
+
+    async def _stream(self, messages: list, max_tokens: int) -> AsyncIterator[str]:
         """
         Private dispatcher method to route analysis to the correct provider.
+        Identical requests made within the cache lifetime are answered from
+        memory without contacting the provider.
         """
         provider = config.MODEL_PROVIDER.lower()
         if provider == 'local':
-            return self._analyze_local(prompt)
+            stream = self._stream_local(messages, max_tokens)
         elif provider == 'openai':
-            return self._analyze_openai(prompt)
+            stream = self._stream_openai(messages, max_tokens)
         else:
             logger.error(f"Invalid MODEL_PROVIDER configured: {config.MODEL_PROVIDER}")
             raise ValueError(f"Invalid model provider '{config.MODEL_PROVIDER}' specified in config.")
 
-    def summarize(self, text: str) -> str:
+        key = self._cache_key(provider, messages, max_tokens)
+        cached = self._get_cached_response(key)
+        if cached is not None:
+            logger.info(f"Response cache hit ({self.cache_hits} hits, {self.cache_misses} misses).")
+            await stream.aclose()
+            yield cached
+            return
+
+        partial = ""
+        async for partial in stream:
+            yield partial
+        # Only complete responses are cached; an interrupted stream never reaches this point.
+        self._store_response(key, partial)
+
+    async def summarize(self, text: str) -> str:
         """
         Generates a summary of the provided text.
         """
-        logger.info("Summarization task requested.")
-        prompt = f"""
-        Provide a concise summary of the following text. 
-        Focus on the key points and main conclusions.
+        return await collect_stream(self.summarize_stream(text))
 
-        Text:
-        ---
-        {text}
-        ---
-        Summary:
+    async def summarize_stream(self, text: str) -> AsyncIterator[str]:
+        """
+        Streams a summary of the provided text as it is generated.
         """
-        return self._analyze(prompt)
+        logger.info("Summarization task requested.")
+        prompt = _fill_template(_SUMMARY_PARTS, text)
+        async for partial in self._stream([{"role": "user", "content": prompt}], config.ANALYSIS_MAX_TOKENS):
+            yield partial
 
-    def get_sentiment(self, text: str) -> str:
+    async def get_sentiment(self, text: str) -> str:
         """
         Performs sentiment analysis on the provided text.
         """
-        logger.info("Sentiment analysis task requested.")
-        prompt = f"""
-        Analyze the sentiment of the following text.
-        Your response must have two parts:
-        1.  **Sentiment:** Classify the sentiment as Positive, Negative, or Neutral.
-        2.  **Justification:** Briefly explain why you chose that sentiment, referencing key words or phrases from the text.
-
-        Format your response clearly using Markdown.
+        return await collect_stream(self.get_sentiment_stream(text))
 
-        Text:
-        ---
-        {text}
-        ---
-        Sentiment:
+    async def get_sentiment_stream(self, text: str) -> AsyncIterator[str]:
         """
-        return self._analyze(prompt)
+        Streams a sentiment analysis of the provided text as it is generated.
+        """
+        logger.info("Sentiment analysis task requested.")
+        prompt = _fill_template(_SENTIMENT_PARTS, text)
+        async for partial in self._stream([{"role": "user", "content": prompt}], config.ANALYSIS_MAX_TOKENS):
+            yield partial
 
-    def answer_question(self, text: str, question: str, chat_history: list) -> str:
+    async def answer_question(self, text: str, question: str, chat_history: list) -> str:
         """
         Answers a question based on the provided text.
         """
-        logger.info(f"Q&A task requested for question: '{question}'")
-        # Format the chat history for the prompt
-        formatted_history = "\n".join([f"User: {q}\nAssistant: {a}" for q, a in chat_history])
-        
-        prompt = f"""
-        You are a machine. You are a Q&A engine that answers questions about a document.
-        You MUST follow these rules strictly:
-        1. Use the "Conversation History" to understand the user's question, especially for follow-ups.
-        2. Find the answer to the user's "New User Question" using ONLY the "Document Transcript".
-        3. If the answer is not in the transcript, you MUST ONLY respond with the exact phrase: 'That information is not available in the provided document.'
-        4. Do not apologize. Do not explain your reasoning. Do not add any other words.
-
-        ---
-        **DOCUMENT TRANSCRIPT:**
-        {text}
-        ---
-        **CONVERSATION HISTORY:**
-        {formatted_history}
-        ---
-        **NEW USER QUESTION:**
-        {question}
+        return await collect_stream(self.answer_question_stream(text, question, chat_history))
+
+    async def answer_question_stream(self, text: str, question: str, chat_history: list) -> AsyncIterator[str]:
         """
+        Streams the answer to a question based on the provided text.
+        The complete answer is checked once generation has finished.
+        """
+        logger.info(f"Q&A task requested for question: '{question}'")
+        # Only the most recent turns are kept, so the prompt does not grow with the conversation.
+        recent_history = chat_history[-config.CHAT_HISTORY_WINDOW:] if config.CHAT_HISTORY_WINDOW > 0 else []
+        text = _select_relevant_chunks(text, question)
+
+        # The transcript goes first as a fixed system message, followed by the
+        # previous turns and the new question, so consecutive turns share a prefix.
+        messages = [{"role": "system", "content": _fill_template(_QA_SYSTEM_PARTS, text)}]
+        for previous_question, previous_answer in recent_history:
+            messages.append({"role": "user", "content": previous_question})
+            messages.append({"role": "assistant", "content": previous_answer})
+        messages.append({"role": "user", "content": question})
+
+        response = ""
+        async for response in self._stream(messages, config.QA_MAX_TOKENS):
+            yield response
         
-        response = self._analyze(prompt)
-        
-        # Check for our custom error signal from the LLM
-        if "ERROR: The answer to this question cannot be found" in response:
+        # Check for the reply the prompt asks for when the answer is not in the transcript
+        stripped = response.lstrip()
+        if stripped[:16].lower() == "that information" and _UNANSWERABLE.match(stripped):
             logger.warning(f"Model indicated question '{question}' is unanswerable from text.")
             raise IrrelevantQuestionError(
                 "The question could not be answered based on the provided audio content."
             )
-            
-        return response
+
+
+    async def analyze_all(self, text: str, question: str = None, chat_history: list = None) -> dict:
+        """
+        Runs the summary, the sentiment analysis and, if a question is given,
+        the Q&A task concurrently, so their round-trips to the provider overlap.
+        How much they overlap on a local server depends on how many requests
+        Ollama is configured to serve in parallel.
+
+        Returns:
+            A dict with "summary", "sentiment" and "answer" (None without a question).
+        """
+        tasks = [self.summarize(text), self.get_sentiment(text)]
+        if question:
+            tasks.append(self.answer_question(text, question, chat_history or []))
+        results = await asyncio.gather(*tasks)
+        return {
+            "summary": results[0],
+            "sentiment": results[1],
+            "answer": results[2] if question else None,
+        }
+
+
+# A single process-wide instance shared by all user sessions.
+analysis_service = AnalysisService()
@@ -0,0 +1,112 @@
+import asyncio
+from src import config
+from src.services.transcription_service import TranscriptionService, transcription_service
+from src.logging_config import logger
+
+
+class BatchedTranscriber:
+    """
+    Collects transcription requests from concurrent sessions into small batches.
+
+    Requests that arrive within a short window are handed to the model in a
+    single call, which amortizes the per-call overhead of running Whisper.
+    A single worker task, bound to the running event loop, drains the queue.
+    """
+
+    def __init__(self, service: TranscriptionService, max_batch_size: int, max_wait_ms: int):
+        self.service = service
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _ensure_worker(self):
+        """
+        Starts the worker task on the current event loop if it is not already running.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, file_path: str, audio=None, duration_seconds: float = None) -> str:
+        """
+        Queues an audio file for transcription and waits for its transcript.
+        Audio that has already been read or preloaded can be passed as `audio`,
+        and a duration already measured by the validator as `duration_seconds`.
+
+        Raises:
+            TranscriptionError: If the transcription process fails.
+        """
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((file_path, audio, duration_seconds, future))
+        return await future
+
+    async def _collect_batch(self) -> list:
+        """
+        Waits for one request, then gathers any others that arrive before the
+        batch is full or the wait window closes.
+        """
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        """
+        Worker loop that transcribes queued files batch by batch.
+        """
+        while True:
+            batch = await self._collect_batch()
+            file_paths = [file_path for file_path, _, _, _ in batch]
+            audios = [audio for _, audio, _, _ in batch]
+            durations = [duration_seconds for _, _, duration_seconds, _ in batch]
+            try:
+                transcripts = await asyncio.to_thread(
+                    self.service.transcribe_batch, file_paths, audios, durations
+                )
+            except Exception as e:
+                if len(batch) == 1:
+                    transcripts = [e]
+                else:
+                    # One bad file fails the whole batch, so retry each file on its own.
+                    logger.warning(f"Batched transcription failed, retrying files individually: {e}")
+                    transcripts = [
+                        await self._transcribe_single(file_path, audio, duration_seconds)
+                        for file_path, audio, duration_seconds in zip(file_paths, audios, durations)
+                    ]
+
+            for (_, _, _, future), transcript in zip(batch, transcripts):
+                if future.done():
+                    continue
+                if isinstance(transcript, Exception):
+                    future.set_exception(transcript)
+                else:
+                    future.set_result(transcript)
+
+    async def _transcribe_single(self, file_path: str, audio=None, duration_seconds: float = None):
+        """
+        Transcribes one file, returning the exception instead of raising it.
+        """
+        try:
+            return await asyncio.to_thread(self.service.transcribe, file_path, audio, duration_seconds)
+        except Exception as e:
+            return e
+
+
+# A single process-wide batcher in front of the shared transcription service.
+batched_transcriber = BatchedTranscriber(
+    transcription_service,
+    max_batch_size=config.TRANSCRIPTION_BATCH_SIZE,
+    max_wait_ms=config.TRANSCRIPTION_BATCH_WAIT_MS
+)
@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+from typing import Optional
+from src import config
+from src.utils.hashing import key_digest
+from src.logging_config import logger
+
+
+class TranscriptCache:
+    """
+    A simple on-disk cache of transcripts, keyed by audio content and model.
+    Each entry is stored as a small JSON file in the configured cache directory.
+    Entries are written atomically, and only the most recently used ones are kept.
+    """
+
+    def __init__(self, cache_dir: str = None):
+        self._cache_dir = cache_dir
+
+    @property
+    def cache_dir(self) -> str:
+        return self._cache_dir or config.TRANSCRIPT_CACHE_DIR
+
+    @property
+    def enabled(self) -> bool:
+        return config.TRANSCRIPT_CACHE_ENABLED
+
+    def _entry_path(self, key: str) -> str:
+        """
+        Maps a cache key to the file that stores its entry.
+        """
+        file_name = key_digest(key)
+        return os.path.join(self.cache_dir, f"{file_name}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Returns the cached transcript for the key, or None on a miss.
+        Unreadable entries are treated as misses.
+        """
+        if not self.enabled:
+            return None
+
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable transcript cache entry {path}: {e}")
+            return None
+
+        if entry.get("key") != key:
+            return None
+        try:
+            # Reads refresh the entry's modification time, which orders entries for trimming.
+            os.utime(path)
+        except OSError:
+            pass
+        logger.info("Transcript cache hit.")
+        return entry.get("transcript")
+
+    def put(self, key: str, transcript: str):
+        """
+        Stores a transcript under the key. Failures are logged but never
+        interrupt the processing workflow.
+        """
+        if not self.enabled:
+            return
+
+        path = self._entry_path(key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temporary file and rename it, so readers never see a partial entry.
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=self.cache_dir, suffix=".tmp", delete=False
+            ) as f:
+                json.dump({"key": key, "transcript": transcript}, f)
+            os.replace(f.name, path)
+        except OSError as e:
+            logger.warning(f"Could not write transcript cache entry {path}: {e}")
+            return
+        self._trim()
+
+    def _trim(self):
+        """
+        Removes the least recently used entries beyond TRANSCRIPT_CACHE_MAX_ENTRIES.
+        """
+        try:
+            with os.scandir(self.cache_dir) as entries:
+                files = [entry for entry in entries if entry.name.endswith(".json")]
+            if len(files) <= config.TRANSCRIPT_CACHE_MAX_ENTRIES:
+                return
+            files.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in files[:len(files) - config.TRANSCRIPT_CACHE_MAX_ENTRIES]:
+                os.remove(entry.path)
+        except OSError as e:
+            logger.warning(f"Could not trim transcript cache: {e}")
@@ -1,10 +1,39 @@
+import io
+import math
+import mimetypes
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+import numpy as np
 import torch
 from transformers import pipeline, Pipeline
-from openai import OpenAI, OpenAIError
+from transformers.pipelines.audio_utils import ffmpeg_read
+from openai import (
+    OpenAI,
+    DefaultHttpxClient,
+    OpenAIError,
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+    RateLimitError
+)
 from src import config
-from src.utils.exceptions import TranscriptionError
+from src.utils.exceptions import TranscriptionError, ValidationError
+from src.utils.validator import Validator
 from src.logging_config import logger
 
+try:
+    from faster_whisper import WhisperModel
+except ImportError:
+    WhisperModel = None
+
+if torch.cuda.is_available():
+    # Let FP32 matrix multiplications use TF32 tensor cores.
+    torch.set_float32_matmul_precision("high")
+
 
 class TranscriptionService:
     """
@@ -12,6 +41,63 @@ class TranscriptionService:
     It can use either a local model or the OpenAI API based on the configuration.
     """
     _local_pipeline: Pipeline = None
+    _fw_model = None
+    _fw_missing_logged = False
+    _model_lock = threading.Lock()
+    _openai_client: OpenAI = None
+    _openai_client_key: str = None
+    _openai_http_client: httpx.Client = None
+    # When the connection pool last talked to OpenAI (time.monotonic())
+    _openai_last_used = 0.0
+
+    @classmethod
+    def _get_client(cls) -> OpenAI:
+        """
+        Returns the shared OpenAI client, creating it on first use so its
+        connection pool is reused across uploads. The client is rebuilt if the
+        configured API key changes.
+        """
+        if cls._openai_client is None or cls._openai_client_key != config.OPENAI_API_KEY:
+            cls._openai_http_client = DefaultHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=100,
+                    max_keepalive_connections=20,
+                    keepalive_expiry=config.OPENAI_KEEPALIVE_SECONDS
+                )
+            )
+            cls._openai_client = OpenAI(
+                api_key=config.OPENAI_API_KEY,
+                timeout=60,
+                max_retries=3,
+                http_client=cls._openai_http_client
+            )
+            cls._openai_client_key = config.OPENAI_API_KEY
+            cls._openai_last_used = 0.0
+        return cls._openai_client
+
+    @staticmethod
+    def _select_dtype(device: str) -> torch.dtype:
+        """
+        Picks the lowest precision the device runs efficiently: FP16 on GPU,
+        BF16 on CPUs with native BF16 support, and FP32 everywhere else.
+        """
+        if device.startswith("cuda"):
+            return torch.float16
+        bf16_supported = getattr(torch.cpu, "is_bf16_supported", None)
+        if bf16_supported is not None and bf16_supported():
+            return torch.bfloat16
+        return torch.float32
+
+    @staticmethod
+    def _supports_static_cache(model) -> bool:
+        """
+        Returns True if the installed transformers version can generate with
+        a static KV-cache for this model (transformers 4.42 and later for Whisper).
+        """
+        return bool(
+            getattr(model, "_supports_static_cache", False)
+            or getattr(model, "_can_compile_fullgraph", False)
+        )
 
     @classmethod
     def _get_local_pipeline(cls) -> Pipeline:
@@ -21,37 +107,203 @@ class TranscriptionService:
         ensuring the model is loaded only once.
         """
         if cls._local_pipeline is None:
-            try:
-                logger.info(
-                    f"Initializing local transcription model: {config.LOCAL_TRANSCRIPTION_MODEL}"
-                )
-                # Check for GPU availability
-                device = "cuda:0" if torch.cuda.is_available() else "cpu"
-                logger.info(f"Using device: {device} for transcription.")
-                
-                cls._local_pipeline = pipeline(
-                    "automatic-speech-recognition",
-                    model=config.LOCAL_TRANSCRIPTION_MODEL,
-                    device=device
-                )
-                logger.info("Local transcription model initialized successfully.")
-            except Exception as e:
-                logger.critical(f"Failed to load local transcription model: {e}", exc_info=True)
-                raise TranscriptionError(
-                    "Could not initialize the local transcription model. "
-                    "Please check model name and dependencies."
-                )
+            # Double-checked locking: concurrent first requests load the model only once.
+            with cls._model_lock:
+                if cls._local_pipeline is None:
+                    try:
+                        logger.info(
+                            f"Initializing local transcription model: {config.LOCAL_TRANSCRIPTION_MODEL}"
+                        )
+                        # Check for GPU availability
+                        device = "cuda:0" if torch.cuda.is_available() else "cpu"
+                        # Half precision halves the weight memory traffic compared to FP32.
+                        torch_dtype = cls._select_dtype(device)
+                        logger.info(f"Using device: {device} ({torch_dtype}) for transcription.")
+
+                        local_pipeline = pipeline(
+                            "automatic-speech-recognition",
+                            model=config.LOCAL_TRANSCRIPTION_MODEL,
+                            device=device,
+                            torch_dtype=torch_dtype,
+                            chunk_length_s=config.LOCAL_TRANSCRIPTION_CHUNK_LENGTH_S,
+                            batch_size=config.LOCAL_TRANSCRIPTION_CHUNK_BATCH,
+                            model_kwargs={
+                                "low_cpu_mem_usage": True,
+                                "use_safetensors": True,
+                                "attn_implementation": "sdpa",
+                            }
+                        )
+                        model = local_pipeline.model
+                        # Without a static cache the growing KV-cache would recompile every step,
+                        # so older transformers versions run the model uncompiled.
+                        if device.startswith("cuda") and cls._supports_static_cache(model):
+                            # A static KV-cache lets the compiled forward pass replay CUDA graphs
+                            # instead of launching every kernel from Python on each decoding step.
+                            # forward is compiled rather than the module, because generate() is
+                            # looked up on the original model and would bypass a compiled wrapper.
+                            model.generation_config.cache_implementation = "static"
+                            model.forward = torch.compile(model.forward, mode="reduce-overhead", fullgraph=False)
+                        cls._local_pipeline = local_pipeline
+                        logger.info("Local transcription model initialized successfully.")
+                    except Exception as e:
+                        logger.critical(f"Failed to load local transcription model: {e}", exc_info=True)
+                        raise TranscriptionError(
+                            "Could not initialize the local transcription model. "
+                            "Please check model name and dependencies."
+                        )
         return cls._local_pipeline
 
-    def _transcribe_local(self, file_path: str) -> str:
+    @classmethod
+    def _uses_faster_whisper(cls) -> bool:
+        """
+        Returns True if local transcription should run on faster-whisper.
+        """
+        if config.LOCAL_TRANSCRIPTION_BACKEND.lower() != 'faster-whisper':
+            return False
+        if WhisperModel is None:
+            if not cls._fw_missing_logged:
+                logger.warning("faster-whisper is not installed, using the transformers pipeline instead.")
+                cls._fw_missing_logged = True
+            return False
+        return True
+
+    @classmethod
+    def _get_fw_model(cls):
+        """
+        Initializes and returns the int8-quantized faster-whisper model,
+        caching it at class level like the transformers pipeline.
+        """
+        if cls._fw_model is None:
+            # Double-checked locking: concurrent first requests load the model only once.
+            with cls._model_lock:
+                if cls._fw_model is None:
+                    try:
+                        device = "cuda" if torch.cuda.is_available() else "cpu"
+                        compute_type = "int8_float16" if device == "cuda" else "int8"
+                        logger.info(
+                            f"Initializing faster-whisper model: {config.FASTER_WHISPER_MODEL} "
+                            f"on {device} ({compute_type})"
+                        )
+                        cls._fw_model = WhisperModel(
+                            config.FASTER_WHISPER_MODEL,
+                            device=device,
+                            compute_type=compute_type,
+                            cpu_threads=os.cpu_count() or 0
+                        )
+                        logger.info("faster-whisper model initialized successfully.")
+                    except Exception as e:
+                        logger.critical(f"Failed to load faster-whisper model: {e}", exc_info=True)
+                        raise TranscriptionError(
+                            "Could not initialize the local transcription model. "
+                            "Please check model name and dependencies."
+                        )
+        return cls._fw_model
+
+    def _local_sampling_rate(self) -> int:
+        """
+        Returns the sampling rate the local model expects, loading it if needed.
+        """
+        if self._uses_faster_whisper():
+            return self._get_fw_model().feature_extractor.sampling_rate
+        return self._get_local_pipeline().feature_extractor.sampling_rate
+
+    def _run_fw_model(self, file_path: str, audio) -> str:
+        """
+        Transcribes one file with faster-whisper, using greedy decoding and
+        skipping silent stretches with voice activity detection.
+        """
+        if isinstance(audio, dict):
+            source = audio["raw"]
+        elif audio is not None:
+            source = io.BytesIO(audio)
+        else:
+            source = file_path
+        segments, _ = self._get_fw_model().transcribe(source, beam_size=1, vad_filter=True)
+        # Segments are generated lazily; joining them runs the transcription.
+        return "".join(segment.text for segment in segments).strip()
+
+    def warm_up(self):
+        """
+        Loads the local transcription model and runs it once on a second of
+        silence, so the first user request does not pay the start-up cost.
+        Failures are logged and left for the first real request to surface.
+        """
+        if config.MODEL_PROVIDER.lower() != 'local':
+            return
+        try:
+            logger.info("Warming up local transcription model.")
+            sampling_rate = self._local_sampling_rate()
+            silence = {"raw": np.zeros(sampling_rate, dtype=np.float32), "sampling_rate": sampling_rate}
+            if self._uses_faster_whisper():
+                self._run_fw_model("warm-up", silence)
+            else:
+                self._get_local_pipeline()(silence)
+            logger.info("Local transcription model warmed up.")
+        except Exception as e:
+            logger.warning(f"Transcription warm-up failed: {e}")
+
+    def warm_up_connection(self):
+        """
+        Opens a pooled connection to the OpenAI API with a bodiless HEAD request,
+        so an upload that follows skips the TCP and TLS handshakes. Does nothing
+        for the local model, or while the pool still holds a live connection.
+        Failures are left for the upload itself to report.
+        """
+        if config.MODEL_PROVIDER.lower() != 'openai' or not config.OPENAI_API_KEY:
+            return
+        client = self._get_client()
+        if time.monotonic() - type(self)._openai_last_used < config.OPENAI_KEEPALIVE_SECONDS:
+            return
+        try:
+            # Any response, even an error status, leaves an open connection in the pool.
+            self._openai_http_client.head(str(client.base_url), timeout=5)
+            type(self)._openai_last_used = time.monotonic()
+        except httpx.HTTPError as e:
+            logger.info(f"Could not open a connection to OpenAI ahead of the upload: {e}")
+
+    def preload_audio(self, audio: bytes):
+        """
+        Prepares audio bytes for transcription ahead of time, so the work can
+        overlap with validation. For the local model the audio is decoded and
+        resampled to the model's sampling rate (loading the model if needed);
+        the OpenAI API takes the encoded bytes as they are.
+
+        Raises:
+            TranscriptionError: If the audio cannot be decoded.
+        """
+        if config.MODEL_PROVIDER.lower() != 'local':
+            return audio
+        sampling_rate = self._local_sampling_rate()
+        try:
+            return {"raw": ffmpeg_read(audio, sampling_rate), "sampling_rate": sampling_rate}
+        except Exception as e:
+            logger.error(f"Error decoding audio for local transcription: {e}", exc_info=True)
+            raise TranscriptionError("The audio file could not be decoded for transcription.")
+
+    @staticmethod
+    def _pipeline_input(file_path: str, audio):
+        """
+        Picks the pipeline input for a file: preloaded samples, in-memory bytes, or the path.
+        """
+        if isinstance(audio, dict):
+            # The pipeline pops keys from dict inputs, so hand it a copy.
+            return dict(audio)
+        return audio if audio is not None else file_path
+
+    def _transcribe_local(self, file_path: str, audio=None) -> str:
         """
         Transcribes audio using a local Hugging Face model.
         """
         try:
             logger.info(f"Starting local transcription for {file_path}")
+            if self._uses_faster_whisper():
+                transcript_text = self._run_fw_model(file_path, audio)
+                logger.info(f"Local transcription successful for {file_path}")
+                return transcript_text
             pipeline = self._get_local_pipeline()
-            # The pipeline handles chunking for long audio files automatically
-            result = pipeline(file_path)
+            # The pipeline accepts decoded samples, in-memory bytes and file paths alike,
+            # and splits long audio into chunks that are transcribed in batches
+            result = pipeline(self._pipeline_input(file_path, audio))
             transcript_text = result["text"].strip()
             logger.info(f"Local transcription successful for {file_path}")
             return transcript_text
@@ -59,7 +311,52 @@ class TranscriptionService:
             logger.error(f"Error during local transcription for {file_path}: {e}", exc_info=True)
             raise TranscriptionError("An unexpected error occurred during local transcription.")
 
-    def _transcribe_openai(self, file_path: str) -> str:
+    def _upload_openai(self, file_name: str, audio) -> str:
+        """
+        Sends one audio file, given as bytes or an open binary file, to the
+        OpenAI transcription endpoint and returns its text.
+        """
+        # The file name and content type tell the API which audio format it receives.
+        content_type = mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+        transcript = self._get_client().audio.transcriptions.create(
+            model=config.OPENAI_TRANSCRIPTION_MODEL,
+            file=(file_name, audio, content_type)
+        )
+        type(self)._openai_last_used = time.monotonic()
+        return transcript.text.strip()
+
+    @staticmethod
+    def _cut_segment(file_path: str, start_seconds: float, length_seconds: float) -> bytes:
+        """
+        Extracts one stretch of a recording as MP3 with ffmpeg. ffmpeg seeks to
+        the start in the input file, so only this segment is decoded and held in memory.
+        """
+        result = subprocess.run(
+            ["ffmpeg", "-v", "error", "-ss", str(start_seconds), "-t", str(length_seconds),
+             "-i", file_path, "-vn", "-f", "mp3", "pipe:1"],
+            capture_output=True, check=True, timeout=300
+        )
+        return result.stdout
+
+    def _transcribe_openai_segments(self, file_path: str, duration_seconds: float) -> str:
+        """
+        Cuts a long recording into segments and transcribes them in parallel,
+        joining the results in order. Each worker cuts its own segment just
+        before uploading it, so at most OPENAI_PARALLEL_UPLOADS segments are in memory.
+        """
+        segment_seconds = config.OPENAI_SEGMENT_MINS * 60
+        segment_count = math.ceil(duration_seconds / segment_seconds)
+        logger.info(f"Transcribing {file_path} as {segment_count} parallel segments")
+
+        def transcribe_segment(index: int) -> str:
+            segment = self._cut_segment(file_path, index * segment_seconds, segment_seconds)
+            return self._upload_openai(f"segment_{index}.mp3", segment)
+
+        with ThreadPoolExecutor(max_workers=config.OPENAI_PARALLEL_UPLOADS) as executor:
+            texts = executor.map(transcribe_segment, range(segment_count))
+            return " ".join(text for text in texts if text)
+
+    def _transcribe_openai(self, file_path: str, audio: bytes = None, duration_seconds: float = None) -> str:
         """
         Transcribes audio using the OpenAI API.
         """
@@ -67,34 +364,62 @@ class TranscriptionService:
             logger.error("OpenAI API key not found for transcription.")
             raise TranscriptionError("OpenAI API key is not configured.")
         
+        if duration_seconds is None:
+            try:
+                duration_seconds = Validator.get_duration_seconds(file_path)
+            except ValidationError:
+                duration_seconds = 0
+
         try:
             logger.info(f"Sending transcription request to OpenAI for {file_path}")
-            client = OpenAI(api_key=config.OPENAI_API_KEY)
             
-            with open(file_path, "rb") as audio_file:
-                transcript = client.audio.transcriptions.create(
-                    model=config.OPENAI_TRANSCRIPTION_MODEL,
-                    file=audio_file
-                )
+            if duration_seconds > config.OPENAI_SPLIT_MINS * 60:
+                transcript_text = self._transcribe_openai_segments(file_path, duration_seconds)
+            elif audio is not None:
+                transcript_text = self._upload_openai(os.path.basename(file_path), audio)
+            else:
+                # An open file handle is streamed from disk rather than read into memory.
+                with open(file_path, "rb") as audio_file:
+                    transcript_text = self._upload_openai(os.path.basename(file_path), audio_file)
             
-            transcript_text = transcript.text.strip()
             logger.info(f"OpenAI transcription successful for {file_path}")
             return transcript_text
-        except OpenAIError as e:
+        except APITimeoutError as e:
+            logger.error(f"OpenAI transcription timed out for {file_path}: {e}", exc_info=True)
+            raise TranscriptionError("The OpenAI API took too long to respond. Please try again.")
+        except APIConnectionError as e:
+            logger.error(f"Could not connect to OpenAI for transcription of {file_path}: {e}", exc_info=True)
+            raise TranscriptionError("Could not reach the OpenAI API. Please check the network connection.")
+        except RateLimitError as e:
+            retry_after = e.response.headers.get("retry-after")
+            logger.error(f"OpenAI rate limit reached for {file_path} (retry after: {retry_after}): {e}", exc_info=True)
+            wait = f"{retry_after} seconds" if retry_after else "a moment"
+            raise TranscriptionError(f"The OpenAI API rate limit was reached. Please wait {wait} and try again.")
+        except APIStatusError as e:
             logger.error(f"OpenAI API error during transcription for {file_path}: {e.response.text}", exc_info=True)
-            raise TranscriptionError(f"An OpenAI API error occurred: {e.response.status_code}")
+            raise TranscriptionError(f"An OpenAI API error occurred: {e.status_code}")
+        except OpenAIError as e:
+            logger.error(f"OpenAI client error during transcription for {file_path}: {e}", exc_info=True)
+            raise TranscriptionError("An OpenAI API error occurred.")
+        except subprocess.CalledProcessError as e:
+            logger.error(f"ffmpeg could not cut {file_path} into segments: {e.stderr!r}", exc_info=True)
+            raise TranscriptionError("The audio file could not be split for transcription.")
         except Exception as e:
             logger.error(f"An unexpected error occurred during OpenAI transcription for {file_path}: {e}", exc_info=True)
             raise TranscriptionError("An unexpected error occurred while using the OpenAI API.")
 
 
-    def transcribe(self, file_path: str) -> str:
+    def transcribe(self, file_path: str, audio=None, duration_seconds: float = None) -> str:
         """
         Public method to transcribe an audio file.
         Delegates to the appropriate method based on the MODEL_PROVIDER config.
 
         Args:
             file_path: The path to the audio file to be transcribed.
+            audio: The file's contents if already read, or the result of
+                preload_audio, to avoid reading and decoding it again.
+            duration_seconds: The audio duration if already known from validation,
+                to avoid probing the file again.
 
         Returns:
             The transcribed text as a string.
@@ -107,9 +432,58 @@ class TranscriptionService:
         logger.info(f"Transcription requested with provider: {provider}")
 
         if provider == 'local':
-            return self._transcribe_local(file_path)
+            return self._transcribe_local(file_path, audio)
         elif provider == 'openai':
-            return self._transcribe_openai(file_path)
+            return self._transcribe_openai(file_path, audio, duration_seconds)
         else:
             logger.error(f"Invalid MODEL_PROVIDER configured: {config.MODEL_PROVIDER}")
             raise ValueError(f"Invalid model provider '{config.MODEL_PROVIDER}' specified in config.")
+
+    def _transcribe_local_batch(self, file_paths: list[str], audios: list) -> list[str]:
+        """
+        Transcribes several audio files in one batched pass of the local model.
+        """
+        try:
+            logger.info(f"Starting batched local transcription of {len(file_paths)} files")
+            pipeline = self._get_local_pipeline()
+            inputs = [self._pipeline_input(file_path, audio) for file_path, audio in zip(file_paths, audios)]
+            # Long files are split into chunks, so never run fewer chunks at once than the pipeline is configured for
+            results = pipeline(inputs, batch_size=max(len(inputs), config.LOCAL_TRANSCRIPTION_CHUNK_BATCH))
+            logger.info(f"Batched local transcription successful for {len(file_paths)} files")
+            return [result["text"].strip() for result in results]
+        except Exception as e:
+            logger.error(f"Error during batched local transcription: {e}", exc_info=True)
+            raise TranscriptionError("An unexpected error occurred during local transcription.")
+
+    def supports_batching(self) -> bool:
+        """
+        Returns True if several files can be transcribed in one batched forward
+        pass. Only the local transformers pipeline can; the OpenAI API takes one
+        file per request, and faster-whisper transcribes one file per call.
+        """
+        return config.MODEL_PROVIDER.lower() == 'local' and not self._uses_faster_whisper()
+
+    def transcribe_batch(self, file_paths: list[str], audios: list = None, durations: list = None) -> list[str]:
+        """
+        Transcribes several audio files, returning the transcripts in the same order.
+        When supports_batching() is True they run through the transformers
+        pipeline in a single batch; otherwise they are transcribed one by one.
+        `audios` optionally holds the already-read or preloaded audio of each file,
+        and `durations` the duration of each file in seconds, if known.
+
+        Raises:
+            TranscriptionError: If the transcription process fails.
+            ValueError: If the configured MODEL_PROVIDER is invalid.
+        """
+        audios = audios or [None] * len(file_paths)
+        durations = durations or [None] * len(file_paths)
+        if len(file_paths) > 1 and self.supports_batching():
+            return self._transcribe_local_batch(file_paths, audios)
+        return [
+            self.transcribe(file_path, audio, duration_seconds)
+            for file_path, audio, duration_seconds in zip(file_paths, audios, durations)
+        ]
+
+
+# A single process-wide instance shared by all user sessions.
+transcription_service = TranscriptionService()
@@ -0,0 +1,156 @@
+import gradio as gr
+from src.controllers import ops
+from src.controllers.ops import SessionState
+from src.utils.exceptions import AppError
+from src.logging_config import logger
+from src import config
+
+
+async def process_audio_file(audio_file_path, session):
+    """
+    Handles the primary audio processing workflow when a user uploads a file.
+    """
+    # Define the updates for a failed state (all components disabled)
+    fail_updates = (
+        gr.update(), gr.update(interactive=False), gr.update(interactive=False),
+        gr.update(interactive=False), gr.update(interactive=False),
+        gr.update(interactive=False), "<p>Please upload a file to begin.</p>", []
+    )
+    # Define the updates for a successful state (all components enabled)
+    success_updates = (
+        gr.update(), gr.update(interactive=True), gr.update(interactive=True),
+        gr.update(interactive=True), gr.update(interactive=True),
+        gr.update(interactive=True), "<p style='color:green;'>File processed successfully. Ready for analysis.</p>", []
+    )
+
+    if audio_file_path is None:
+        return fail_updates
+        
+    try:
+        logger.info(f"UI received file: {audio_file_path}")
+        await ops.process_audio_file(session, audio_file_path)
+        return success_updates
+    except AppError as e:
+        logger.error(f"UI caught an application error: {e}")
+        # Return a failure state but with a specific error message for the user.
+        error_return = list(fail_updates)
+        error_return[6] = f"<p style='color:red;'>Error: {e}</p>"
+        return tuple(error_return)
+
+async def handle_question(question, session):
+    """
+    Manages the conversational Q&A flow. It takes the user's question, streams the
+    model's response, and yields the growing chat history.
+    """
+    if not question.strip():
+        # Do not process empty questions, just return the current state.
+        yield session.chat_history, ""
+        return
+    try:
+        # Show the answer as it is generated; the input box is cleared straight away.
+        history = session.chat_history + [[question, ""]]
+        async for answer in ops.answer_question_stream(session, question):
+            history[-1][1] = answer
+            yield history, ""
+        # The session keeps the completed Q&A turn in its own history.
+        yield session.chat_history, ""
+    except AppError as e:
+        logger.error(f"UI caught an application error during Q&A: {e}")
+        # On error, create a temporary history to show the error without saving it to the permanent chat log.
+        temp_history = session.chat_history + [[question, f"Error: {e}"]]
+        yield temp_history, question
+
+def handle_transcript(session, chat_history):
+    """Appends the full transcript to the current chat display."""
+    chat_history.append([None, ops.get_transcript(session)])
+    return chat_history
+
+async def handle_summary(session, chat_history):
+    """Streams a generated summary into the current chat display."""
+    chat_history.append([None, ""])
+    async for summary in ops.stream_summary(session):
+        chat_history[-1][1] = summary
+        yield chat_history
+
+async def handle_sentiment(session, chat_history):
+    """Streams a sentiment analysis into the current chat display."""
+    chat_history.append([None, ""])
+    async for sentiment in ops.stream_sentiment(session):
+        chat_history[-1][1] = sentiment
+        yield chat_history
+
+def build_demo(theme) -> gr.Blocks:
+    """
+    Builds the application's Gradio interface with the given theme.
+    All event handlers are wired here, so entry points only choose a theme and launch.
+    """
+    #  Gradio UI Definition 
+    # Uploaded files stay in Gradio's cache, which is swept periodically instead of
+    # deleting each file on the request path.
+    with gr.Blocks(
+        theme=theme,
+        css="footer {visibility: hidden}",
+        title=config.APP_TITLE,
+        delete_cache=config.GRADIO_DELETE_CACHE
+    ) as demo:
+        # A lightweight per-user state; the services behind it are shared by all sessions.
+        session_state = gr.State(value=SessionState)
+
+        # Main layout starts here.
+        gr.Markdown(f"# 🗣️ {config.APP_TITLE}")
+        gr.Markdown(config.APP_DESCRIPTION)
+
+        with gr.Row(equal_height=True):
+            # Left column for inputs and actions
+            with gr.Column(scale=1):
+                audio_input = gr.Audio(type="filepath", label="Upload Audio File")
+                status_output = gr.Markdown(value="<p>Please upload a file to begin.</p>")
+
+                with gr.Accordion("Analysis Actions", open=True):
+                    transcript_btn = gr.Button("Show Full Transcript", interactive=False)
+                    summarize_btn = gr.Button("Generate Summary", interactive=False)
+                    sentiment_btn = gr.Button("Analyze Sentiment", interactive=False)
+
+            # Right column for chatbot interaction
+            with gr.Column(scale=2):
+                chatbot_ui = gr.Chatbot(label="Chatbot", height=500, show_copy_button=True)
+                with gr.Row():
+                    question_input = gr.Textbox(
+                        show_label=False,
+                        placeholder="Type your question here...",
+                        interactive=False,
+                        scale=4
+                    )
+                    submit_btn = gr.Button(
+                        value="Submit", 
+                        interactive=False, 
+                        variant="primary",
+                        scale=1
+                    )
+
+        # Defines how UI components react to user actions.
+        # Handle the audio file upload and processing.
+        audio_input.upload(
+            fn=process_audio_file,
+            inputs=[audio_input, session_state],
+            outputs=[
+                audio_input, transcript_btn, summarize_btn, sentiment_btn, 
+                question_input, submit_btn, status_output, chatbot_ui
+            ],
+            # Concurrent uploads are grouped into one batched Whisper call, so allow
+            # as many in flight as fit in a batch; the batch size bounds GPU memory.
+            concurrency_limit=config.TRANSCRIPTION_BATCH_SIZE
+        )
+
+        #  Handle the analysis actions.
+        # Showing the transcript is a cheap state lookup, so it is never queued behind LLM calls.
+        transcript_btn.click(fn=handle_transcript, inputs=[session_state, chatbot_ui], outputs=[chatbot_ui], concurrency_limit=None)
+        summarize_btn.click(fn=handle_summary, inputs=[session_state, chatbot_ui], outputs=[chatbot_ui])
+        sentiment_btn.click(fn=handle_sentiment, inputs=[session_state, chatbot_ui], outputs=[chatbot_ui])
+
+        # Handle the question submission.
+        # Both triggers share one concurrency pool so they are limited together.
+        question_input.submit(fn=handle_question, inputs=[question_input, session_state], outputs=[chatbot_ui, question_input], concurrency_id="question")
+        submit_btn.click(fn=handle_question, inputs=[question_input, session_state], outputs=[chatbot_ui, question_input], concurrency_id="question")
+
+    return demo
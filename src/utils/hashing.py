@@ -0,0 +1,18 @@
+import hashlib
+
+
+def content_digest(data: bytes) -> str:
+    """
+    Returns the SHA-256 hex digest of file contents, used to recognise
+    uploads of the same audio. hashlib hands the buffer to OpenSSL in one
+    call, which uses the CPU's SHA extensions where available.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def key_digest(text: str) -> str:
+    """
+    Returns a short BLAKE2b hex digest of a cache key or prompt.
+    BLAKE2b is faster than SHA-256 in software, and 128 bits are ample for cache keys.
+    """
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
@@ -1,4 +1,7 @@
 import os
+import stat
+import subprocess
+import soundfile
 from pydub import AudioSegment
 from pydub.exceptions import CouldntDecodeError
 from src import config
@@ -11,34 +14,115 @@ from src.utils.exceptions import (
 from src.logging_config import logger
 
 
+# Leading bytes that identify each allowed container format
+_SIGNATURES = {
+    b"ID3": ".mp3",
+    b"fLaC": ".flac",
+    b"OggS": ".ogg",
+}
+
+
 class Validator:
     """
     A class to handle all input validation for the application.
     """
 
     @staticmethod
-    def validate_audio_file(file_path: str):
+    def _sniff_format(head: bytes) -> str | None:
         """
-        Validates an uploaded audio file against the rules in config.py.
+        Identifies the audio container from the first 12 bytes of a file.
+        Returns the matching file extension, or None if the format is not recognised.
+        """
+        for signature, ext in _SIGNATURES.items():
+            if head.startswith(signature):
+                return ext
+        if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+            return ".wav"
+        if head[4:8] == b"ftyp":
+            return ".m4a"
+        # MP3 files without an ID3 tag start directly with an MPEG frame sync
+        if len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0:
+            return ".mp3"
+        return None
 
-        This method checks for file existence, type, size, and duration.
+    @staticmethod
+    def _probe_duration_seconds(file_path: str) -> float | None:
+        """
+        Reads the duration of an audio file from its container metadata with
+        ffprobe. Returns None if ffprobe is not installed or cannot read the file.
+        """
+        try:
+            result = subprocess.run(
+                ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+                 "-of", "default=noprint_wrappers=1:nokey=1", file_path],
+                capture_output=True, text=True, timeout=10
+            )
+            return float(result.stdout)
+        except (OSError, subprocess.SubprocessError, ValueError):
+            return None
+
+    @staticmethod
+    def get_duration_seconds(file_path: str) -> float:
+        """
+        Returns the duration of an audio file in seconds.
+
+        The duration is read from the container header where possible, which
+        only touches a few kilobytes of the file: libsndfile handles WAV, FLAC
+        and MP3, and ffprobe covers other containers such as M4A. Only if both
+        fail is the whole file decoded with pydub.
+
+        Raises:
+            ValidationError: If the audio file is corrupted or cannot be read.
+        """
+        try:
+            info = soundfile.info(file_path)
+            if info.samplerate > 0:
+                return info.frames / info.samplerate
+        except RuntimeError:
+            logger.info(f"Could not read audio header of {file_path}, probing it with ffprobe.")
+
+        duration = Validator._probe_duration_seconds(file_path)
+        if duration is not None:
+            return duration
+        logger.info(f"Could not probe duration of {file_path}, decoding the file instead.")
+
+        try:
+            return AudioSegment.from_file(file_path).duration_seconds
+        except CouldntDecodeError:
+            logger.error(f"Validation failed: Could not decode audio file {file_path}. "
+                         "It may be corrupted or an unsupported format.")
+            raise ValidationError(
+                "Failed to read audio file. It may be corrupted or in an "
+                "unsupported format despite the file extension."
+            )
+
+    @staticmethod
+    def check_file(file_path: str):
+        """
+        Runs the checks that need no audio decoding: existence, type, size and
+        the file signature. These only stat the file and read its first 12 bytes,
+        so bad uploads are rejected before any audio is read in full.
 
         Args:
             file_path: The path to the uploaded audio file.
 
         Raises:
-            ValidationError: If the file does not exist.
-            InvalidFileType: If the file extension is not in the allowed list.
+            ValidationError: If the file does not exist, is not a regular file or is empty.
+            InvalidFileType: If the file extension is not in the allowed list
+                or the file contents do not match it.
             FileSizeExceeded: If the file size is over the configured limit.
-            FileLengthExceeded: If the audio duration is over the configured limit.
-            ValidationError: If the audio file is corrupted or cannot be read.
         """
         logger.info(f"Initiating validation for file: {file_path}")
 
         # 1. Check for file existence
-        if not os.path.exists(file_path):
+        try:
+            file_stat = os.stat(file_path)
+        except FileNotFoundError:
             logger.error(f"Validation failed: File not found at {file_path}")
             raise ValidationError(f"File not found at path: {file_path}")
+        if not stat.S_ISREG(file_stat.st_mode):
+            logger.error(f"Validation failed: {file_path} is not a regular file")
+            raise ValidationError(f"Path is not a file: {file_path}")
 
         # 2. Validate file type (extension)
         _, ext = os.path.splitext(file_path)
@@ -52,7 +136,10 @@ class Validator:
             )
 
         # 3. Validate file size
-        file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
+        if file_stat.st_size == 0:
+            logger.warning(f"Validation failed: File {file_path} is empty")
+            raise ValidationError("The uploaded file is empty.")
+        file_size_mb = file_stat.st_size / (1024 * 1024)
         if file_size_mb > config.MAX_FILE_SIZE_MB:
             logger.warning(
                 f"Validation failed: File size {file_size_mb:.2f}MB exceeds "
@@ -63,25 +150,68 @@ class Validator:
                 f"{config.MAX_FILE_SIZE_MB}MB limit."
             )
 
-        # 4. Validate file duration
-        try:
-            audio = AudioSegment.from_file(file_path)
-            duration_mins = audio.duration_seconds / 60
-            if duration_mins > config.MAX_FILE_LENGTH_MINS:
-                logger.warning(
-                    f"Validation failed: Duration {duration_mins:.2f} mins exceeds "
-                    f"limit of {config.MAX_FILE_LENGTH_MINS} mins for {file_path}"
-                )
-                raise FileLengthExceeded(
-                    f"Audio duration of {duration_mins:.2f} minutes exceeds the "
-                    f"{config.MAX_FILE_LENGTH_MINS} minute limit."
-                )
-        except CouldntDecodeError:
-            logger.error(f"Validation failed: Could not decode audio file {file_path}. "
-                         "It may be corrupted or an unsupported format.")
-            raise ValidationError(
-                "Failed to read audio file. It may be corrupted or in an "
-                "unsupported format despite the file extension."
+        # 4. Check that the contents match the extension
+        with open(file_path, "rb") as audio_file:
+            head = audio_file.read(12)
+        sniffed_ext = Validator._sniff_format(head)
+        if sniffed_ext != ext.lower():
+            logger.warning(
+                f"Validation failed: Contents of {file_path} do not match "
+                f"its '{ext}' extension (detected: {sniffed_ext or 'unknown'})"
+            )
+            raise InvalidFileType(
+                f"The file contents do not match the '{ext}' file type."
+            )
+
+    @staticmethod
+    def check_duration(file_path: str) -> float:
+        """
+        Checks the audio duration of a file that has passed check_file.
+
+        Returns:
+            The duration in seconds.
+
+        Raises:
+            FileLengthExceeded: If the audio duration is over the configured limit.
+            ValidationError: If the audio file is corrupted or cannot be read.
+        """
+        duration_seconds = Validator.get_duration_seconds(file_path)
+        duration_mins = duration_seconds / 60
+        if duration_mins > config.MAX_FILE_LENGTH_MINS:
+            logger.warning(
+                f"Validation failed: Duration {duration_mins:.2f} mins exceeds "
+                f"limit of {config.MAX_FILE_LENGTH_MINS} mins for {file_path}"
+            )
+            raise FileLengthExceeded(
+                f"Audio duration of {duration_mins:.2f} minutes exceeds the "
+                f"{config.MAX_FILE_LENGTH_MINS} minute limit."
             )
 
         logger.info(f"Validation successful for file: {file_path}")
+        return duration_seconds
+
+    @staticmethod
+    def validate_audio_file(file_path: str) -> float:
+        """
+        Validates an uploaded audio file against the rules in config.py.
+
+        This method checks for file existence, type, size, and duration.
+        Existence and size come from a single stat call, and the file's leading
+        bytes must match its extension before any audio is decoded.
+
+        Args:
+            file_path: The path to the uploaded audio file.
+
+        Returns:
+            The audio duration in seconds.
+
+        Raises:
+            ValidationError: If the file does not exist, is not a regular file or is empty.
+            InvalidFileType: If the file extension is not in the allowed list
+                or the file contents do not match it.
+            FileSizeExceeded: If the file size is over the configured limit.
+            FileLengthExceeded: If the audio duration is over the configured limit.
+            ValidationError: If the audio file is corrupted or cannot be read.
+        """
+        Validator.check_file(file_path)
+        return Validator.check_duration(file_path)
@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# Keep the application log of test runs out of the working tree. This runs
+# before any test module imports src, which configures logging on import.
+os.environ.setdefault(
+    "VOICE_ANALYSIS_LOG_FILE",
+    os.path.join(tempfile.gettempdir(), "voice_analysis_tests", "app.log")
+)
@@ -0,0 +1,186 @@
+import asyncio
+import pytest
+from src.services.analysis_service import AnalysisService, _select_relevant_chunks
+from src.utils.exceptions import IrrelevantQuestionError
+from src import config
+
+
+def test_select_relevant_chunks_keeps_short_transcript():
+    """
+    Tests that a transcript below the length threshold is passed through unchanged.
+    """
+    # 1. Arrange
+    text = "The budget was approved on Monday."
+
+    # 2. Act
+    result = _select_relevant_chunks(text, "When was the budget approved?")
+
+    # 3. Assert
+    assert result == text
+
+
+def test_select_relevant_chunks_picks_matching_excerpt(monkeypatch):
+    """
+    Tests that only the excerpts related to the question are kept for a long transcript.
+    """
+    # 1. Arrange: Shrink the limits so a small transcript counts as long.
+    monkeypatch.setattr(config, "QA_FULL_TRANSCRIPT_WORDS", 10)
+    monkeypatch.setattr(config, "QA_CHUNK_WORDS", 5)
+    monkeypatch.setattr(config, "QA_MAX_CHUNKS", 1)
+    text = (
+        "we talked about the weather "
+        "the budget was approved today "
+        "lunch was served at noon"
+    )
+
+    # 2. Act
+    result = _select_relevant_chunks(text, "Was the budget approved?")
+
+    # 3. Assert
+    assert result == "the budget was approved today"
+
+
+def test_answer_question_uses_recent_history_only(mocker, monkeypatch):
+    """
+    Tests that only the configured number of previous turns is sent to the model.
+    """
+    # 1. Arrange
+    monkeypatch.setattr(config, "CHAT_HISTORY_WINDOW", 1)
+    prompts = []
+
+    async def fake_stream(messages, max_tokens):
+        prompts.append("\n".join(message["content"] for message in messages))
+        yield "An answer."
+
+    service = AnalysisService()
+    mocker.patch.object(service, "_stream", side_effect=fake_stream)
+    history = [["old question", "old answer"], ["recent question", "recent answer"]]
+
+    # 2. Act
+    asyncio.run(service.answer_question("A transcript.", "New question?", history))
+
+    # 3. Assert
+    assert "recent question" in prompts[0]
+    assert "old question" not in prompts[0]
+
+
+def test_answer_question_keeps_transcript_as_fixed_prefix(mocker):
+    """
+    Tests that the transcript is sent as the first message, unchanged between turns,
+    so the model server can reuse its cache for it.
+    """
+    # 1. Arrange
+    sent = []
+
+    async def fake_stream(messages, max_tokens):
+        sent.append(messages)
+        yield "An answer."
+
+    service = AnalysisService()
+    mocker.patch.object(service, "_stream", side_effect=fake_stream)
+
+    # 2. Act: Ask two consecutive questions.
+    asyncio.run(service.answer_question("A transcript.", "First?", []))
+    asyncio.run(service.answer_question("A transcript.", "Second?", [["First?", "An answer."]]))
+
+    # 3. Assert
+    assert sent[0][0] == sent[1][0]
+    assert sent[0][0]["role"] == "system"
+    assert sent[1][-1] == {"role": "user", "content": "Second?"}
+
+
+def test_analyze_all_runs_tasks_concurrently(mocker):
+    """
+    Tests that the independent analyses are in flight at the same time.
+    """
+    # 1. Arrange: Each fake request records how many requests are running when it starts.
+    running = 0
+    peak = 0
+
+    async def fake_stream(messages, max_tokens):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        yield "A result."
+
+    service = AnalysisService()
+    mocker.patch.object(service, "_stream", side_effect=fake_stream)
+
+    # 2. Act
+    results = asyncio.run(service.analyze_all("A transcript.", "A question?"))
+
+    # 3. Assert
+    assert results == {"summary": "A result.", "sentiment": "A result.", "answer": "A result."}
+    assert peak == 3
+
+
+def test_repeated_request_is_served_from_response_cache(mocker, monkeypatch):
+    """
+    Tests that an identical request is answered from the cache without calling the model again.
+    """
+    # 1. Arrange
+    monkeypatch.setattr(config, "MODEL_PROVIDER", "local")
+    monkeypatch.setattr(AnalysisService, "_response_cache", type(AnalysisService._response_cache)())
+    calls = []
+
+    async def fake_stream_local(messages, max_tokens):
+        calls.append(messages)
+        yield "A summary."
+
+    service = AnalysisService()
+    mocker.patch.object(service, "_stream_local", side_effect=fake_stream_local)
+
+    # 2. Act
+    first = asyncio.run(service.summarize("A transcript."))
+    second = asyncio.run(service.summarize("A transcript."))
+
+    # 3. Assert
+    assert first == second == "A summary."
+    assert len(calls) == 1
+
+
+def test_local_stream_yields_once_per_token(mocker, monkeypatch):
+    """
+    Tests that the Ollama stream yields the growing response for each token,
+    and that the closing chunk without content adds no extra update.
+    """
+    # 1. Arrange
+    monkeypatch.setattr(config, "MODEL_PROVIDER", "local")
+
+    async def fake_chat(**kwargs):
+        async def chunks():
+            for content in ["The ", "budget", ""]:
+                yield {"message": {"content": content}}
+        return chunks()
+
+    client = mocker.Mock()
+    client.chat = fake_chat
+    mocker.patch.object(AnalysisService, "_get_ollama_client", return_value=client)
+
+    async def consume():
+        return [partial async for partial in AnalysisService()._stream_local([], 16)]
+
+    # 2. Act
+    partials = asyncio.run(consume())
+
+    # 3. Assert
+    assert partials == ["The", "The budget"]
+
+
+def test_answer_question_detects_unanswerable_reply(mocker):
+    """
+    Tests that the reply the prompt prescribes for unanswerable questions
+    raises IrrelevantQuestionError.
+    """
+    # 1. Arrange
+    async def fake_stream(messages, max_tokens):
+        yield "That information is not available in the provided document."
+
+    service = AnalysisService()
+    mocker.patch.object(service, "_stream", side_effect=fake_stream)
+
+    # 2. Act & 3. Assert
+    with pytest.raises(IrrelevantQuestionError):
+        asyncio.run(service.answer_question("A transcript.", "What is the weather?", []))
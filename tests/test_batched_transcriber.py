@@ -0,0 +1,59 @@
+import asyncio
+from src.services.batched_transcriber import BatchedTranscriber
+from src.utils.exceptions import TranscriptionError
+
+
+class FakeService:
+    """Records how files are handed to the transcription service."""
+    def __init__(self, bad_file=None):
+        self.batches = []
+        self.bad_file = bad_file
+
+    def transcribe(self, file_path, audio=None, duration_seconds=None):
+        if file_path == self.bad_file:
+            raise TranscriptionError("Bad audio!")
+        return f"transcript of {file_path}"
+
+    def transcribe_batch(self, file_paths, audios=None, durations=None):
+        self.batches.append(list(file_paths))
+        return [self.transcribe(file_path) for file_path in file_paths]
+
+
+def test_concurrent_requests_are_batched():
+    """
+    Tests that uploads arriving together are transcribed in a single batch.
+    """
+    # 1. Arrange
+    service = FakeService()
+    batcher = BatchedTranscriber(service, max_batch_size=4, max_wait_ms=50)
+
+    async def submit_all():
+        return await asyncio.gather(*(batcher.submit(f"audio_{i}.mp3") for i in range(3)))
+
+    # 2. Act
+    transcripts = asyncio.run(submit_all())
+
+    # 3. Assert: One model call served every request, in order.
+    assert service.batches == [["audio_0.mp3", "audio_1.mp3", "audio_2.mp3"]]
+    assert transcripts == [f"transcript of audio_{i}.mp3" for i in range(3)]
+
+
+def test_failed_file_does_not_fail_the_batch():
+    """
+    Tests that one bad file only fails its own request.
+    """
+    # 1. Arrange
+    service = FakeService(bad_file="bad.mp3")
+    batcher = BatchedTranscriber(service, max_batch_size=4, max_wait_ms=50)
+
+    async def submit_all():
+        return await asyncio.gather(
+            batcher.submit("good.mp3"), batcher.submit("bad.mp3"), return_exceptions=True
+        )
+
+    # 2. Act
+    good, bad = asyncio.run(submit_all())
+
+    # 3. Assert
+    assert good == "transcript of good.mp3"
+    assert isinstance(bad, TranscriptionError)
@@ -1,25 +1,50 @@
+import asyncio
+import time
 import pytest
 from src.controllers.processing_controller import ProcessingController
 from src.utils.exceptions import ValidationError, AppError
+from src import config
 
 
+# Keep the transcript cache inside the test's temporary directory.
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "TRANSCRIPT_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(config, "TRANSCRIPT_CACHE_ENABLED", True)
+
+async def fake_stream(*partials):
+    """Mimics a streaming LLM response by yielding each partial text in turn."""
+    for partial in partials:
+        yield partial
+
+# Skip decoding audio for the real model; the transcription service is mocked in these tests.
+@pytest.fixture(autouse=True)
+def no_audio_preload(mocker):
+    mocker.patch(
+        "src.services.transcription_service.TranscriptionService.preload_audio",
+        side_effect=lambda audio: audio
+    )
+
 # This ensures tests are isolated and don't interfere with each other.
 @pytest.fixture
 def controller():
     return ProcessingController()
 
-def test_process_audio_file_success(controller, mocker):
+def test_process_audio_file_success(controller, mocker, tmp_path):
     """
     Tests the main success path of the controller.
     We will mock the validator and transcription service to simulate a successful run.
     """
     # 1. Arrange
-    fake_file_path = "path/to/fake/audio.mp3"
+    fake_file = tmp_path / "audio.mp3"
+    fake_file.write_bytes(b"fake audio")
+    fake_file_path = str(fake_file)
     expected_transcript = "This is a test transcript."
 
     # Mock the dependencies:
-    # Replace the Validator's method with a mock that does nothing.
-    mocker.patch("src.utils.validator.Validator.validate_audio_file")
+    # Replace the Validator's methods with mocks that do nothing.
+    mocker.patch("src.utils.validator.Validator.check_file")
+    mocker.patch("src.utils.validator.Validator.check_duration", return_value=60)
     # Replace the TranscriptionService's method with a mock that returns our expected text.
     mocker.patch(
         "src.services.transcription_service.TranscriptionService.transcribe",
@@ -27,12 +52,74 @@ def test_process_audio_file_success(controller, mocker):
     )
 
     # 2. Act: Run the method we are testing.
-    controller.process_audio_file(fake_file_path)
+    asyncio.run(controller.process_audio_file(fake_file_path))
 
     # 3. Assert: Check that the controller's internal state (the transcript) was set correctly.
     assert controller.transcript == expected_transcript
 
 
+def test_process_audio_file_uses_transcript_cache(controller, mocker, tmp_path):
+    """
+    Tests that uploading the same audio twice only transcribes it once.
+    """
+    # 1. Arrange
+    fake_file = tmp_path / "audio.mp3"
+    fake_file.write_bytes(b"fake audio")
+    mocker.patch("src.utils.validator.Validator.check_file")
+    mocker.patch("src.utils.validator.Validator.check_duration", return_value=60)
+    transcribe_mock = mocker.patch(
+        "src.services.transcription_service.TranscriptionService.transcribe",
+        return_value="This is a test transcript."
+    )
+
+    # 2. Act: Process the same file with two separate controllers.
+    asyncio.run(controller.process_audio_file(str(fake_file)))
+    second_controller = ProcessingController()
+    asyncio.run(second_controller.process_audio_file(str(fake_file)))
+
+    # 3. Assert: The second run was served from the cache.
+    assert transcribe_mock.call_count == 1
+    assert second_controller.transcript == "This is a test transcript."
+
+
+def test_concurrent_uploads_are_not_serialized(mocker, monkeypatch, tmp_path):
+    """
+    Tests that uploads from concurrent sessions are transcribed in parallel
+    when the provider cannot batch them, instead of waiting on one another.
+    """
+    # 1. Arrange: Four different files, each taking 0.5 seconds to transcribe.
+    monkeypatch.setattr(config, "MODEL_PROVIDER", "openai")
+    mocker.patch("src.utils.validator.Validator.check_file")
+    mocker.patch("src.utils.validator.Validator.check_duration", return_value=60)
+
+    def slow_transcribe(file_path, audio=None, duration_seconds=None):
+        time.sleep(0.5)
+        return f"transcript of {file_path}"
+
+    mocker.patch(
+        "src.services.transcription_service.TranscriptionService.transcribe",
+        side_effect=slow_transcribe
+    )
+    files = []
+    for i in range(4):
+        fake_file = tmp_path / f"audio_{i}.mp3"
+        fake_file.write_bytes(f"fake audio {i}".encode())
+        files.append(str(fake_file))
+    controllers = [ProcessingController() for _ in files]
+
+    async def process_all():
+        await asyncio.gather(*(c.process_audio_file(f) for c, f in zip(controllers, files)))
+
+    # 2. Act
+    started = time.perf_counter()
+    asyncio.run(process_all())
+    elapsed = time.perf_counter() - started
+
+    # 3. Assert: Run one after another, the uploads would take 2 seconds.
+    assert elapsed < 1.5
+    assert [c.transcript for c in controllers] == [f"transcript of {f}" for f in files]
+
+
 def test_process_audio_file_validation_fails(controller, mocker):
     """
     Tests that if the validator raises an error, the controller catches it
@@ -43,7 +130,7 @@ def test_process_audio_file_validation_fails(controller, mocker):
 
     # Mock the Validator to raise an error when called.
     mocker.patch(
-        "src.utils.validator.Validator.validate_audio_file",
+        "src.utils.validator.Validator.check_file",
         side_effect=ValidationError("Bad file!")
     )
     # We also create a "spy" on the transcribe method to make sure it's NOT called.
@@ -52,7 +139,7 @@ def test_process_audio_file_validation_fails(controller, mocker):
     # 2. Act & 3. Assert
     # Check that the controller correctly propagates the validation error.
     with pytest.raises(ValidationError, match="Bad file!"):
-        controller.process_audio_file(fake_file_path)
+        asyncio.run(controller.process_audio_file(fake_file_path))
 
     # Assert that transcription was never attempted.
     assert transcribe_spy.call_count == 0
@@ -60,6 +147,26 @@ def test_process_audio_file_validation_fails(controller, mocker):
     assert controller.transcript is None
 
 
+def test_process_audio_file_rejects_before_reading(controller, mocker, tmp_path):
+    """
+    Tests that a file failing the basic checks is never read in full or
+    prepared for the transcription model.
+    """
+    # 1. Arrange: A text file renamed to .mp3
+    fake_file = tmp_path / "notes.mp3"
+    fake_file.write_bytes(b"These are my meeting notes.")
+    read_spy = mocker.patch("src.controllers.ops._read_audio_file")
+    preload_spy = mocker.patch(
+        "src.services.transcription_service.TranscriptionService.preload_audio"
+    )
+
+    # 2. Act & 3. Assert
+    with pytest.raises(ValidationError, match="do not match"):
+        asyncio.run(controller.process_audio_file(str(fake_file)))
+    assert read_spy.call_count == 0
+    assert preload_spy.call_count == 0
+
+
 def test_get_summary_success(controller, mocker):
     """
     Tests the summary functionality after a file has been successfully processed.
@@ -68,19 +175,61 @@ def test_get_summary_success(controller, mocker):
     controller.transcript = "This is a test transcript." # Set the state directly.
     expected_summary = "This is a summary."
 
-    # Mock the AnalysisService to return our fake summary.
+    # Mock the AnalysisService to stream our fake summary.
     mocker.patch(
-        "src.services.analysis_service.AnalysisService.summarize",
-        return_value=expected_summary
+        "src.services.analysis_service.AnalysisService.summarize_stream",
+        side_effect=lambda text: fake_stream("This is", expected_summary)
     )
 
     # 2. Act
-    result = controller.get_summary()
+    result = asyncio.run(controller.get_summary())
 
     # 3. Assert
     assert result == expected_summary
 
 
+def test_get_summary_is_memoized(controller, mocker):
+    """
+    Tests that repeated summary requests for the same transcript reuse the first result.
+    """
+    # 1. Arrange
+    controller.transcript = "This is a test transcript."
+    summarize_mock = mocker.patch(
+        "src.services.analysis_service.AnalysisService.summarize_stream",
+        side_effect=lambda text: fake_stream("This is", "This is a summary.")
+    )
+
+    # 2. Act
+    first = asyncio.run(controller.get_summary())
+    second = asyncio.run(controller.get_summary())
+
+    # 3. Assert: The LLM was only asked once.
+    assert first == second == "This is a summary."
+    assert summarize_mock.call_count == 1
+
+
+def test_answer_question_stream_records_final_answer(controller, mocker):
+    """
+    Tests that a streamed answer is yielded piece by piece and stored in the history once complete.
+    """
+    # 1. Arrange
+    controller.transcript = "This is a test transcript."
+    mocker.patch(
+        "src.services.analysis_service.AnalysisService.answer_question_stream",
+        side_effect=lambda text, question, history: fake_stream("It is", "It is a test.")
+    )
+
+    async def consume():
+        return [answer async for answer in controller.answer_question_stream("What is it?")]
+
+    # 2. Act
+    partials = asyncio.run(consume())
+
+    # 3. Assert
+    assert partials == ["It is", "It is a test."]
+    assert controller.chat_history == [["What is it?", "It is a test."]]
+
+
 def test_get_summary_before_processing_fails(controller):
     """
     Tests the guard condition: an error should be raised if we request a summary
@@ -92,4 +241,4 @@ def test_get_summary_before_processing_fails(controller):
     # 2. Act & 3. Assert
     # Check that the specific AppError is raised.
     with pytest.raises(AppError, match="Please process an audio file before requesting analysis."):
-        controller.get_summary()
+        asyncio.run(controller.get_summary())
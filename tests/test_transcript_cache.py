@@ -0,0 +1,29 @@
+import os
+from src.services.transcript_cache import TranscriptCache
+from src import config
+
+
+def test_put_keeps_only_most_recent_entries(tmp_path, monkeypatch):
+    """
+    Tests that the cache removes its least recently used entries once it holds
+    more than the configured number.
+    """
+    # 1. Arrange
+    monkeypatch.setattr(config, "TRANSCRIPT_CACHE_ENABLED", True)
+    monkeypatch.setattr(config, "TRANSCRIPT_CACHE_MAX_ENTRIES", 2)
+    cache = TranscriptCache(str(tmp_path))
+    cache.put("first", "one")
+    cache.put("second", "two")
+    # Age the entries so their order does not depend on the file system's timestamp resolution.
+    os.utime(cache._entry_path("first"), (1, 1))
+    os.utime(cache._entry_path("second"), (2, 2))
+    cache.get("first")
+
+    # 2. Act
+    cache.put("third", "three")
+
+    # 3. Assert
+    assert cache.get("first") == "one"
+    assert cache.get("second") is None
+    assert cache.get("third") == "three"
+    assert not list(tmp_path.glob("*.tmp"))
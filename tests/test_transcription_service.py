@@ -0,0 +1,219 @@
+import threading
+import time
+from types import SimpleNamespace
+import httpx
+import pytest
+from openai import APIConnectionError
+from src.services import transcription_service as module
+from src.services.transcription_service import TranscriptionService
+from src.utils.exceptions import TranscriptionError
+from src import config
+
+
+def test_local_transcription_uses_faster_whisper(mocker, monkeypatch):
+    """
+    Tests that local transcription runs on faster-whisper when it is the configured
+    backend, joining the text of the generated segments.
+    """
+    # 1. Arrange
+    monkeypatch.setattr(config, "MODEL_PROVIDER", "local")
+    monkeypatch.setattr(config, "LOCAL_TRANSCRIPTION_BACKEND", "faster-whisper")
+    fw_model = mocker.Mock()
+    segments = [SimpleNamespace(text=" Hello"), SimpleNamespace(text=" world. ")]
+    fw_model.transcribe.return_value = (iter(segments), None)
+    monkeypatch.setattr(module, "WhisperModel", mocker.Mock(return_value=fw_model))
+    monkeypatch.setattr(TranscriptionService, "_fw_model", None)
+    pipeline_spy = mocker.patch.object(TranscriptionService, "_get_local_pipeline")
+
+    # 2. Act
+    result = TranscriptionService().transcribe("meeting.wav")
+
+    # 3. Assert
+    assert result == "Hello world."
+    fw_model.transcribe.assert_called_once_with("meeting.wav", beam_size=1, vad_filter=True)
+    assert pipeline_spy.call_count == 0
+
+
+def test_long_openai_upload_is_split_into_ordered_segments(mocker, monkeypatch):
+    """
+    Tests that a recording over the split threshold is cut into segments with
+    ffmpeg, using the duration measured by the validator, and that the segment
+    texts are joined in their original order.
+    """
+    # 1. Arrange: A 1.5 second recording with 0.6 second segments gives three pieces.
+    monkeypatch.setattr(config, "MODEL_PROVIDER", "openai")
+    monkeypatch.setattr(config, "OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(config, "OPENAI_SPLIT_MINS", 0)
+    monkeypatch.setattr(config, "OPENAI_SEGMENT_MINS", 0.01)
+    probe_spy = mocker.patch.object(module.Validator, "get_duration_seconds")
+    cut_segment = mocker.patch.object(
+        TranscriptionService, "_cut_segment", side_effect=lambda path, start, length: f"{start:.1f}".encode()
+    )
+    mocker.patch.object(
+        TranscriptionService, "_upload_openai", side_effect=lambda name, audio: f"<{name} {audio.decode()}>"
+    )
+
+    # 2. Act
+    result = TranscriptionService().transcribe("meeting.mp3", b"audio bytes", duration_seconds=1.5)
+
+    # 3. Assert
+    assert cut_segment.call_count == 3
+    assert probe_spy.call_count == 0
+    assert result == "<segment_0.mp3 0.0> <segment_1.mp3 0.6> <segment_2.mp3 1.2>"
+
+
+def test_openai_connection_error_is_reported(mocker, monkeypatch):
+    """
+    Tests that a network failure, which carries no HTTP response, is reported
+    as a connection problem rather than an unexpected error.
+    """
+    # 1. Arrange
+    monkeypatch.setattr(config, "MODEL_PROVIDER", "openai")
+    monkeypatch.setattr(config, "OPENAI_API_KEY", "test-key")
+    mocker.patch.object(module.Validator, "get_duration_seconds", return_value=60)
+    error = APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1/audio/transcriptions"))
+    mocker.patch.object(TranscriptionService, "_upload_openai", side_effect=error)
+
+    # 2. Act & 3. Assert
+    with pytest.raises(TranscriptionError, match="Could not reach the OpenAI API"):
+        TranscriptionService().transcribe("meeting.mp3", b"audio bytes")
+
+
+def test_concurrent_first_requests_load_pipeline_once(mocker, monkeypatch):
+    """
+    Tests that two threads requesting the pipeline before it exists load the model only once.
+    """
+    # 1. Arrange
+    monkeypatch.setattr(TranscriptionService, "_local_pipeline", None)
+    mocker.patch.object(module.torch.cuda, "is_available", return_value=False)
+
+    def slow_pipeline(*args, **kwargs):
+        time.sleep(0.1)
+        return mocker.Mock()
+
+    pipeline_factory = mocker.patch.object(module, "pipeline", side_effect=slow_pipeline)
+    threads = [threading.Thread(target=TranscriptionService._get_local_pipeline) for _ in range(2)]
+
+    # 2. Act
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 3. Assert
+    assert pipeline_factory.call_count == 1
+
+
+def test_connection_warm_up_skips_a_warm_pool(mocker, monkeypatch):
+    """
+    Tests that the OpenAI connection warm-up sends a single HEAD request, and
+    sends nothing while the pool has been used recently.
+    """
+    # 1. Arrange
+    monkeypatch.setattr(config, "MODEL_PROVIDER", "openai")
+    monkeypatch.setattr(config, "OPENAI_API_KEY", "test-key")
+    for attribute in ("_openai_client", "_openai_client_key", "_openai_http_client"):
+        monkeypatch.setattr(TranscriptionService, attribute, None)
+    monkeypatch.setattr(TranscriptionService, "_openai_last_used", 0.0)
+    service = TranscriptionService()
+    service._get_client()
+    head = mocker.patch.object(TranscriptionService._openai_http_client, "head")
+
+    # 2. Act: The second call follows right after the first.
+    service.warm_up_connection()
+    service.warm_up_connection()
+
+    # 3. Assert
+    assert head.call_count == 1
+
+
+
+def _cuda_pipeline_with_model(mocker, monkeypatch, model):
+    """
+    Builds the local pipeline as if on a GPU, around the given model, with torch.compile mocked.
+    """
+    monkeypatch.setattr(config, "LOCAL_TRANSCRIPTION_BACKEND", "transformers")
+    monkeypatch.setattr(TranscriptionService, "_local_pipeline", None)
+    mocker.patch.object(module.torch.cuda, "is_available", return_value=True)
+    mocker.patch.object(module, "pipeline", return_value=SimpleNamespace(model=model))
+    compile_mock = mocker.patch.object(module.torch, "compile", return_value="compiled forward")
+    TranscriptionService._get_local_pipeline()
+    return compile_mock
+
+
+def test_cuda_pipeline_compiles_model_with_static_cache(mocker, monkeypatch):
+    """
+    Tests that on a GPU a model that supports a static KV-cache is switched to
+    it and has its forward pass compiled.
+    """
+    # 1. Arrange
+    model = SimpleNamespace(
+        _supports_static_cache=True,
+        generation_config=SimpleNamespace(cache_implementation=None),
+        forward=lambda *args, **kwargs: None
+    )
+
+    # 2. Act
+    compile_mock = _cuda_pipeline_with_model(mocker, monkeypatch, model)
+
+    # 3. Assert
+    assert model.generation_config.cache_implementation == "static"
+    assert model.forward == "compiled forward"
+    assert compile_mock.call_count == 1
+
+
+def test_cuda_pipeline_skips_compile_without_static_cache(mocker, monkeypatch):
+    """
+    Tests that on transformers versions without static-cache support for the
+    model, the model is left uncompiled with its default cache.
+    """
+    # 1. Arrange
+    model = SimpleNamespace(
+        generation_config=SimpleNamespace(cache_implementation=None),
+        forward=lambda *args, **kwargs: None
+    )
+
+    # 2. Act
+    compile_mock = _cuda_pipeline_with_model(mocker, monkeypatch, model)
+
+    # 3. Assert
+    assert model.generation_config.cache_implementation is None
+    assert compile_mock.call_count == 0
+    assert TranscriptionService._local_pipeline.model is model
+
+
+def test_faster_whisper_backend_is_not_batched(mocker, monkeypatch):
+    """
+    Tests that uploads are not routed through the batcher on faster-whisper,
+    which transcribes one file per call.
+    """
+    # 1. Arrange
+    monkeypatch.setattr(config, "MODEL_PROVIDER", "local")
+    monkeypatch.setattr(config, "LOCAL_TRANSCRIPTION_BACKEND", "faster-whisper")
+    monkeypatch.setattr(module, "WhisperModel", mocker.Mock())
+
+    # 2. Act
+    batching = TranscriptionService().supports_batching()
+
+    # 3. Assert
+    assert batching is False
+
+
+def test_batch_keeps_configured_chunk_batch_size(mocker, monkeypatch):
+    """
+    Tests that a small batch of files still runs the configured number of
+    30 second chunks through the model at once.
+    """
+    # 1. Arrange
+    monkeypatch.setattr(config, "MODEL_PROVIDER", "local")
+    monkeypatch.setattr(config, "LOCAL_TRANSCRIPTION_BACKEND", "transformers")
+    monkeypatch.setattr(config, "LOCAL_TRANSCRIPTION_CHUNK_BATCH", 8)
+    pipeline = mocker.Mock(return_value=[{"text": " one "}, {"text": " two "}])
+    mocker.patch.object(TranscriptionService, "_get_local_pipeline", return_value=pipeline)
+
+    # 2. Act
+    result = TranscriptionService().transcribe_batch(["a.wav", "b.wav"])
+
+    # 3. Assert
+    assert result == ["one", "two"]
+    assert pipeline.call_args.kwargs["batch_size"] == 8
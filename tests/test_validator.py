@@ -1,3 +1,5 @@
+import time
+import wave
 import pytest
 from src.utils.validator import Validator
 from src.utils.exceptions import (
@@ -16,18 +18,21 @@ def test_validate_audio_file_success(tmp_path):
     Tests the "happy path" - a perfectly valid file should pass without errors.
     `tmp_path` is a special pytest fixture that provides a temporary directory.
     """
-    # We create a dummy file. For this test, its content doesn't matter, only its name and size.
-    valid_file = tmp_path / "test_audio.mp3"
-    valid_file.write_bytes(b"0" * 1024) # Create a 1KB file
+    # 1. Arrange: Write a real one minute WAV file, whose duration is read from its header.
+    valid_file = tmp_path / "test_audio.wav"
+    with wave.open(str(valid_file), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(16000)
+        w.writeframes(b"\x00\x00" * 16000 * 60)
 
-    # 2. Act & 3. Assert: Call the validator and expect no exceptions.
-    try:
-        # Validate the file
-        with pytest.raises(ValidationError):
-            Validator.validate_audio_file(str(valid_file))
-    except FileNotFoundError:
-        # This test might fail if ffmpeg is not installed, which is fine for now.
-        pass
+    # 2. Act: Call the validator; any exception fails the test.
+    started = time.perf_counter()
+    Validator.validate_audio_file(str(valid_file))
+    elapsed = time.perf_counter() - started
+
+    # 3. Assert: Only the header is read, so validation is fast.
+    assert elapsed < 0.2
 
 
 def test_validate_invalid_file_type(tmp_path):
@@ -43,6 +48,22 @@ def test_validate_invalid_file_type(tmp_path):
         Validator.validate_audio_file(str(invalid_file))
 
 
+def test_validate_contents_do_not_match_extension(tmp_path, mocker):
+    """
+    Tests that a file whose contents are not the audio format its extension
+    claims is rejected before any attempt to decode it.
+    """
+    # 1. Arrange: A text file renamed to .wav
+    fake_wav = tmp_path / "notes.wav"
+    fake_wav.write_bytes(b"These are my meeting notes.")
+    decode_spy = mocker.patch("pydub.AudioSegment.from_file")
+
+    # 2. Act & 3. Assert
+    with pytest.raises(InvalidFileType, match="do not match"):
+        Validator.validate_audio_file(str(fake_wav))
+    assert decode_spy.call_count == 0
+
+
 def test_validate_file_size_exceeded(tmp_path):
     """
     Tests that the validator correctly rejects a file that is too large.
@@ -70,9 +91,9 @@ def test_validate_file_length_exceeded(tmp_path, mocker):
     # Temporarily set the max length for our test
     config.MAX_FILE_LENGTH_MINS = 5
 
-    # Create a dummy file. Its actual content doesn't matter.
+    # Create a dummy file. Its actual content doesn't matter, but it must not be empty.
     long_file = tmp_path / "long_audio.mp3"
-    long_file.touch()
+    long_file.write_bytes(b"ID3" + b"0" * 1021)
 
     # Return a fake audio segment that is 360,000 ms long (6 minutes).
     mocker.patch('pydub.AudioSegment.from_file').return_value.duration_seconds = 360
@@ -86,6 +107,60 @@ def test_validate_file_length_exceeded(tmp_path, mocker):
     config.MAX_FILE_LENGTH_MINS = 15 # Or your original default
 
 
+def test_validate_file_length_read_from_header(tmp_path, mocker, monkeypatch):
+    """
+    Tests that the duration of a WAV file is read from its header,
+    without decoding the whole file.
+    """
+    # 1. Arrange: Write a real 2 minute WAV file at a low sample rate.
+    monkeypatch.setattr(config, "MAX_FILE_LENGTH_MINS", 1)
+    wav_file = tmp_path / "two_minutes.wav"
+    with wave.open(str(wav_file), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(1)
+        w.setframerate(1000)
+        w.writeframes(b"\x80" * 1000 * 120)
+    decode_spy = mocker.patch("pydub.AudioSegment.from_file")
+
+    # 2. Act & 3. Assert
+    with pytest.raises(FileLengthExceeded, match="exceeds the 1 minute limit"):
+        Validator.validate_audio_file(str(wav_file))
+    assert decode_spy.call_count == 0
+
+
+def test_validate_file_length_probed_with_ffprobe(tmp_path, mocker, monkeypatch):
+    """
+    Tests that the duration of a format libsndfile cannot read is taken from
+    ffprobe, without decoding the whole file.
+    """
+    # 1. Arrange
+    monkeypatch.setattr(config, "MAX_FILE_LENGTH_MINS", 5)
+    m4a_file = tmp_path / "long_audio.m4a"
+    m4a_file.write_bytes(b"\x00\x00\x00\x20ftypM4A " + b"0" * 1024)
+    mocker.patch("subprocess.run").return_value.stdout = "360.0\n"
+    decode_spy = mocker.patch("pydub.AudioSegment.from_file")
+
+    # 2. Act & 3. Assert
+    with pytest.raises(FileLengthExceeded, match="exceeds the 5 minute limit"):
+        Validator.validate_audio_file(str(m4a_file))
+    assert decode_spy.call_count == 0
+
+
+def test_validate_empty_file(tmp_path, mocker):
+    """
+    Tests that an empty file is rejected before any attempt to read its audio.
+    """
+    # 1. Arrange
+    empty_file = tmp_path / "empty.mp3"
+    empty_file.touch()
+    decode_spy = mocker.patch("pydub.AudioSegment.from_file")
+
+    # 2. Act & 3. Assert
+    with pytest.raises(ValidationError, match="file is empty"):
+        Validator.validate_audio_file(str(empty_file))
+    assert decode_spy.call_count == 0
+
+
 def test_validate_file_not_found():
     """
     Tests that the validator raises an error if the file does not exist.